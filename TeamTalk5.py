@@ -1,5 +1,6 @@
 import sys
 import os
+import time
 import ctypes
 from ctypes import cdll, c_int, c_char, c_wchar, c_wchar_p, c_char_p, \
                    c_longlong, c_uint, c_float, c_void_p, c_uint16, \
@@ -1261,6 +1262,7 @@ class TeamTalk(object):
         self._tt = _InitTeamTalkPoll()
         if not self._tt:
             raise TeamTalkError("failed to initialize")
+        self._eventHandlers = self._buildEventHandlers()
 
     def closeTeamTalk(self):
         return _CloseTeamTalk(self._tt)
@@ -1268,87 +1270,80 @@ class TeamTalk(object):
     def __del__(self):
         self.closeTeamTalk()
 
+    def _buildEventHandlers(self):
+        # Maps each client event to its bound handler and an extractor
+        # that pulls the handler's arguments out of the TTMessage, so that
+        # runEventLoop does a single dict lookup instead of a comparison
+        # per event type.
+        _noArgs = lambda msg: ()
+        return {
+            ClientEvent.CLIENTEVENT_CON_SUCCESS: (self.onConnectSuccess, _noArgs),
+            ClientEvent.CLIENTEVENT_CON_CRYPT_ERROR: (self.onConnectCryptError, lambda msg: (msg.clienterrormsg,)),
+            ClientEvent.CLIENTEVENT_CON_FAILED: (self.onConnectFailed, _noArgs),
+            ClientEvent.CLIENTEVENT_CON_LOST: (self.onConnectionLost, _noArgs),
+            ClientEvent.CLIENTEVENT_CMD_PROCESSING: (self.onCmdProcessing, lambda msg: (msg.nSource, not msg.bActive)),
+            ClientEvent.CLIENTEVENT_CMD_ERROR: (self.onCmdError, lambda msg: (msg.nSource, msg.clienterrormsg)),
+            ClientEvent.CLIENTEVENT_CMD_SUCCESS: (self.onCmdSuccess, lambda msg: (msg.nSource,)),
+            ClientEvent.CLIENTEVENT_CMD_MYSELF_LOGGEDIN: (self.onCmdMyselfLoggedIn, lambda msg: (msg.nSource, msg.useraccount)),
+            ClientEvent.CLIENTEVENT_CMD_MYSELF_LOGGEDOUT: (self.onCmdMyselfLoggedOut, _noArgs),
+            ClientEvent.CLIENTEVENT_CMD_MYSELF_KICKED: (self.onCmdMyselfKickedFromChannel, lambda msg: (msg.nSource, msg.user)),
+            ClientEvent.CLIENTEVENT_CMD_USER_LOGGEDIN: (self.onCmdUserLoggedIn, lambda msg: (msg.user,)),
+            ClientEvent.CLIENTEVENT_CMD_USER_LOGGEDOUT: (self.onCmdUserLoggedOut, lambda msg: (msg.user,)),
+            ClientEvent.CLIENTEVENT_CMD_USER_UPDATE: (self.onCmdUserUpdate, lambda msg: (msg.user,)),
+            ClientEvent.CLIENTEVENT_CMD_USER_JOINED: (self.onCmdUserJoinedChannel, lambda msg: (msg.user,)),
+            ClientEvent.CLIENTEVENT_CMD_USER_LEFT: (self.onCmdUserLeftChannel, lambda msg: (msg.nSource, msg.user)),
+            ClientEvent.CLIENTEVENT_CMD_USER_TEXTMSG: (self.onCmdUserTextMessage, lambda msg: (msg.textmessage,)),
+            ClientEvent.CLIENTEVENT_CMD_CHANNEL_NEW: (self.onCmdChannelNew, lambda msg: (msg.channel,)),
+            ClientEvent.CLIENTEVENT_CMD_CHANNEL_UPDATE: (self.onCmdChannelUpdate, lambda msg: (msg.channel,)),
+            ClientEvent.CLIENTEVENT_CMD_CHANNEL_REMOVE: (self.onCmdChannelRemove, lambda msg: (msg.channel,)),
+            ClientEvent.CLIENTEVENT_CMD_SERVER_UPDATE: (self.onCmdServerUpdate, lambda msg: (msg.serverproperties,)),
+            ClientEvent.CLIENTEVENT_CMD_FILE_NEW: (self.onCmdFileNew, lambda msg: (msg.remotefile,)),
+            ClientEvent.CLIENTEVENT_CMD_FILE_REMOVE: (self.onCmdFileRemove, lambda msg: (msg.remotefile,)),
+            ClientEvent.CLIENTEVENT_USER_RECORD_MEDIAFILE: (self.onUserRecordMediaFile, lambda msg: (msg.nSource, msg.mediafileinfo)),
+            ClientEvent.CLIENTEVENT_CMD_USERACCOUNT_NEW: (self.onUserAccountNew, lambda msg: (msg.useraccount,)),
+            ClientEvent.CLIENTEVENT_CMD_USERACCOUNT_REMOVE: (self.onUserAccountRemove, lambda msg: (msg.useraccount,)),
+            ClientEvent.CLIENTEVENT_USER_STATECHANGE: (self.onUserStateChange, lambda msg: (msg.user,)),
+            ClientEvent.CLIENTEVENT_USER_AUDIOBLOCK: (self.onUserAudioBlock, lambda msg: (msg.nSource, msg.nStreamType)),
+            ClientEvent.CLIENTEVENT_STREAM_MEDIAFILE: (self.onStreamMediaFile, lambda msg: (msg.mediafileinfo,)),
+            ClientEvent.CLIENTEVENT_CMD_USERACCOUNT: (self.onUserAccount, lambda msg: (msg.useraccount,)),
+            ClientEvent.CLIENTEVENT_CMD_BANNEDUSER: (self.onBannedUser, lambda msg: (msg.banneduser,)),
+            ClientEvent.CLIENTEVENT_CMD_SERVERSTATISTICS: (self.onServerStatistics, lambda msg: (msg.serverstatistics,)),
+            ClientEvent.CLIENTEVENT_INTERNAL_ERROR: (self.onInternalError, lambda msg: (msg.clienterrormsg,)),
+            ClientEvent.CLIENTEVENT_SOUNDDEVICE_ADDED: (self.onSoundDeviceAdded, lambda msg: (msg.sounddevice,)),
+            ClientEvent.CLIENTEVENT_SOUNDDEVICE_REMOVED: (self.onSoundDeviceRemoved, lambda msg: (msg.sounddevice,)),
+            ClientEvent.CLIENTEVENT_SOUNDDEVICE_UNPLUGGED: (self.onSoundDeviceUnplugged, lambda msg: (msg.sounddevice,)),
+            ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_INPUT: (self.onSoundDeviceNewDefaultInput, lambda msg: (msg.sounddevice,)),
+            ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_OUTPUT: (self.onSoundDeviceNewDefaultOutput, lambda msg: (msg.sounddevice,)),
+            ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_INPUT_COMDEVICE: (self.onSoundDeviceNewDefaultInputComDevice, lambda msg: (msg.sounddevice,)),
+            ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_OUTPUT_COMDEVICE: (self.onSoundDeviceNewDefaultOutputComDevice, lambda msg: (msg.sounddevice,)),
+        }
+
     def runEventLoop(self, nWaitMSec = -1):
         msg = self.getMessage(nWaitMS = nWaitMSec)
-        event = msg.nClientEvent
-        if event == ClientEvent.CLIENTEVENT_CON_SUCCESS:
-            self.onConnectSuccess()
-        if event == ClientEvent.CLIENTEVENT_CON_CRYPT_ERROR:
-            self.onConnectCryptError(msg.clienterrormsg)
-        if event == ClientEvent.CLIENTEVENT_CON_FAILED:
-            self.onConnectFailed()
-        if event == ClientEvent.CLIENTEVENT_CON_LOST:
-            self.onConnectionLost()
-        if event == ClientEvent.CLIENTEVENT_CMD_PROCESSING:
-            self.onCmdProcessing(msg.nSource, not msg.bActive)
-        if event == ClientEvent.CLIENTEVENT_CMD_ERROR:
-            self.onCmdError(msg.nSource, msg.clienterrormsg)
-        if event == ClientEvent.CLIENTEVENT_CMD_SUCCESS:
-            self.onCmdSuccess(msg.nSource)
-        if event == ClientEvent.CLIENTEVENT_CMD_MYSELF_LOGGEDIN:
-            self.onCmdMyselfLoggedIn(msg.nSource, msg.useraccount)
-        if event == ClientEvent.CLIENTEVENT_CMD_MYSELF_LOGGEDOUT:
-            self.onCmdMyselfLoggedOut()
-        if event == ClientEvent.CLIENTEVENT_CMD_MYSELF_KICKED:
-            self.onCmdMyselfKickedFromChannel(msg.nSource, msg.user)
-        if event == ClientEvent.CLIENTEVENT_CMD_USER_LOGGEDIN:
-            self.onCmdUserLoggedIn(msg.user)
-        if event == ClientEvent.CLIENTEVENT_CMD_USER_LOGGEDOUT:
-            self.onCmdUserLoggedOut(msg.user)
-        if event == ClientEvent.CLIENTEVENT_CMD_USER_UPDATE:
-            self.onCmdUserUpdate(msg.user)
-        if event == ClientEvent.CLIENTEVENT_CMD_USER_JOINED:
-            self.onCmdUserJoinedChannel(msg.user)
-        if event == ClientEvent.CLIENTEVENT_CMD_USER_LEFT:
-            self.onCmdUserLeftChannel(msg.nSource, msg.user)
-        if event == ClientEvent.CLIENTEVENT_CMD_USER_TEXTMSG:
-            self.onCmdUserTextMessage(msg.textmessage)
-        if event == ClientEvent.CLIENTEVENT_CMD_CHANNEL_NEW:
-            self.onCmdChannelNew(msg.channel)
-        if event == ClientEvent.CLIENTEVENT_CMD_CHANNEL_UPDATE:
-            self.onCmdChannelUpdate(msg.channel)
-        if event == ClientEvent.CLIENTEVENT_CMD_CHANNEL_REMOVE:
-            self.onCmdChannelRemove(msg.channel)
-        if event == ClientEvent.CLIENTEVENT_CMD_SERVER_UPDATE:
-            self.onCmdServerUpdate(msg.serverproperties)
-        if event == ClientEvent.CLIENTEVENT_CMD_FILE_NEW:
-            self.onCmdFileNew(msg.remotefile)
-        if event == ClientEvent.CLIENTEVENT_CMD_FILE_REMOVE:
-            self.onCmdFileRemove(msg.remotefile)
-        if event == ClientEvent.CLIENTEVENT_USER_RECORD_MEDIAFILE:
-            self.onUserRecordMediaFile(msg.nSource, msg.mediafileinfo)
-        if event == ClientEvent.CLIENTEVENT_CMD_USERACCOUNT_NEW:
-            self.onUserAccountNew(msg.useraccount)
-        if event == ClientEvent.CLIENTEVENT_CMD_USERACCOUNT_REMOVE:
-            self.onUserAccountRemove(msg.useraccount)
-        if event == ClientEvent.CLIENTEVENT_USER_STATECHANGE:
-            self.onUserStateChange(msg.user)
-        if event == ClientEvent.CLIENTEVENT_USER_AUDIOBLOCK:
-            self.onUserAudioBlock(msg.nSource, msg.nStreamType)
-        if event == ClientEvent.CLIENTEVENT_STREAM_MEDIAFILE:
-            self.onStreamMediaFile(msg.mediafileinfo)
-        if event == ClientEvent.CLIENTEVENT_CMD_USERACCOUNT:
-            self.onUserAccount(msg.useraccount)
-        if event == ClientEvent.CLIENTEVENT_CMD_BANNEDUSER:
-            self.onBannedUser(msg.banneduser)
-        if event == ClientEvent.CLIENTEVENT_CMD_SERVERSTATISTICS:
-            self.onServerStatistics(msg.serverstatistics)
-        if event == ClientEvent.CLIENTEVENT_INTERNAL_ERROR:
-            self.onInternalError(msg.clienterrormsg)
-        if event == ClientEvent.CLIENTEVENT_SOUNDDEVICE_ADDED:
-            self.onSoundDeviceAdded(msg.sounddevice)
-        if event == ClientEvent.CLIENTEVENT_SOUNDDEVICE_REMOVED:
-            self.onSoundDeviceRemoved(msg.sounddevice)
-        if event == ClientEvent.CLIENTEVENT_SOUNDDEVICE_UNPLUGGED:
-            self.onSoundDeviceUnplugged(msg.sounddevice)
-        if event == ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_INPUT:
-            self.onSoundDeviceNewDefaultInput(msg.sounddevice)
-        if event == ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_OUTPUT:
-            self.onSoundDeviceNewDefaultOutput(msg.sounddevice)
-        if event == ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_INPUT_COMDEVICE:
-            self.onSoundDeviceNewDefaultInputComDevice(msg.sounddevice)
-        if event == ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_OUTPUT_COMDEVICE:
-            self.onSoundDeviceNewDefaultOutputComDevice(msg.sounddevice)
+        self._dispatchMessage(msg)
+
+    def runEventLoopBatch(self, max_events: int = 100, budget_ms: int = 50, nWaitMSec: int = -1) -> int:
+        # Block once for the first message, then drain whatever else is
+        # already queued with a zero wait until the queue is empty,
+        # max_events have been handled or budget_ms has elapsed.
+        # Returns the number of events dispatched.
+        msg = self.getMessage(nWaitMS = nWaitMSec)
+        deadline = time.monotonic() + budget_ms / 1000.0
+        processed = 0
+        while msg.nClientEvent != ClientEvent.CLIENTEVENT_NONE:
+            self._dispatchMessage(msg)
+            processed += 1
+            if processed >= max_events or time.monotonic() >= deadline:
+                break
+            msg = self.getMessage(nWaitMS = 0)
+        return processed
+
+    def _dispatchMessage(self, msg):
+        entry = self._eventHandlers.get(msg.nClientEvent)
+        if entry is None:
+            return
+        handler, extractor = entry
+        handler(*extractor(msg))
 
     def getMessage(self, nWaitMS: int = -1):
         msg = TTMessage()
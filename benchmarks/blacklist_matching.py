@@ -0,0 +1,73 @@
+"""
+Measures the per-message cost of blacklist matching: the old approach that
+re-read blacklist.txt and rebuilt the alternation regex for every message,
+against the shared, precompiled `bot.blacklist.Blacklist`.
+
+Run from the project root: python benchmarks/blacklist_matching.py
+"""
+import os
+import random
+import re
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.blacklist import Blacklist
+
+MESSAGE_COUNT = 2000
+
+
+def load_blacklist(filename):
+    """The loader the bot used before, kept here for comparison."""
+    with open(filename, "r", encoding="utf-8") as f:
+        return [line.strip().lower() for line in f]
+
+
+def legacy_check(filename, message):
+    blacklist = load_blacklist(filename)
+    pattern = r"\b(" + "|".join(re.escape(word) for word in blacklist) + r")\b"
+    return bool(blacklist and re.search(pattern, message, re.IGNORECASE))
+
+
+def random_word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+
+
+def build_messages(rng):
+    return [" ".join(random_word(rng) for _ in range(rng.randint(5, 20))) for _ in range(MESSAGE_COUNT)]
+
+
+def bench(label, filename, messages):
+    start = time.perf_counter()
+    for message in messages:
+        legacy_check(filename, message)
+    legacy = (time.perf_counter() - start) / len(messages)
+
+    blacklist = Blacklist(filename)
+    start = time.perf_counter()
+    for message in messages:
+        blacklist.search(message)
+    compiled = (time.perf_counter() - start) / len(messages)
+
+    print(f"{label}: legacy {legacy * 1e6:,.1f} us/message, compiled {compiled * 1e6:,.1f} us/message")
+
+
+def main():
+    rng = random.Random(42)
+    messages = build_messages(rng)
+    bench("blacklist.txt", "blacklist.txt", messages)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+        f.write("\n".join(random_word(rng) for _ in range(10000)))
+        large_list = f.name
+    try:
+        bench("10k words", large_list, messages[:200])
+    finally:
+        os.remove(large_list)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Measures how many events per second TeamTalk.runEventLoop can dispatch,
+comparing the old if-chain with the precomputed dispatch table.
+
+Run from the project root: python benchmarks/event_dispatch.py
+Requires the TeamTalk5 SDK library to be loadable (it is imported by TeamTalk5.py).
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TeamTalk5 import TeamTalk, TTMessage, ClientEvent
+
+EVENT_COUNT = 200000
+
+
+class CountingTeamTalk(TeamTalk):
+    """A TeamTalk object that never touches the C instance and just counts handled events."""
+    def __init__(self):
+        self.handled = 0
+        self._eventHandlers = self._buildEventHandlers()
+
+    def __del__(self):
+        pass
+
+    def onCmdProcessing(self, cmdId, complete):
+        self.handled += 1
+
+    def onCmdUserUpdate(self, user):
+        self.handled += 1
+
+    def onUserAudioBlock(self, nUserID, nStreamType):
+        self.handled += 1
+
+
+# Every event the old runEventLoop compared against, in its original order.
+LEGACY_EVENT_ORDER = [
+    ClientEvent.CLIENTEVENT_CON_SUCCESS, ClientEvent.CLIENTEVENT_CON_CRYPT_ERROR,
+    ClientEvent.CLIENTEVENT_CON_FAILED, ClientEvent.CLIENTEVENT_CON_LOST,
+    ClientEvent.CLIENTEVENT_CMD_PROCESSING, ClientEvent.CLIENTEVENT_CMD_ERROR,
+    ClientEvent.CLIENTEVENT_CMD_SUCCESS, ClientEvent.CLIENTEVENT_CMD_MYSELF_LOGGEDIN,
+    ClientEvent.CLIENTEVENT_CMD_MYSELF_LOGGEDOUT, ClientEvent.CLIENTEVENT_CMD_MYSELF_KICKED,
+    ClientEvent.CLIENTEVENT_CMD_USER_LOGGEDIN, ClientEvent.CLIENTEVENT_CMD_USER_LOGGEDOUT,
+    ClientEvent.CLIENTEVENT_CMD_USER_UPDATE, ClientEvent.CLIENTEVENT_CMD_USER_JOINED,
+    ClientEvent.CLIENTEVENT_CMD_USER_LEFT, ClientEvent.CLIENTEVENT_CMD_USER_TEXTMSG,
+    ClientEvent.CLIENTEVENT_CMD_CHANNEL_NEW, ClientEvent.CLIENTEVENT_CMD_CHANNEL_UPDATE,
+    ClientEvent.CLIENTEVENT_CMD_CHANNEL_REMOVE, ClientEvent.CLIENTEVENT_CMD_SERVER_UPDATE,
+    ClientEvent.CLIENTEVENT_CMD_FILE_NEW, ClientEvent.CLIENTEVENT_CMD_FILE_REMOVE,
+    ClientEvent.CLIENTEVENT_USER_RECORD_MEDIAFILE, ClientEvent.CLIENTEVENT_CMD_USERACCOUNT_NEW,
+    ClientEvent.CLIENTEVENT_CMD_USERACCOUNT_REMOVE, ClientEvent.CLIENTEVENT_USER_STATECHANGE,
+    ClientEvent.CLIENTEVENT_USER_AUDIOBLOCK, ClientEvent.CLIENTEVENT_STREAM_MEDIAFILE,
+    ClientEvent.CLIENTEVENT_CMD_USERACCOUNT, ClientEvent.CLIENTEVENT_CMD_BANNEDUSER,
+    ClientEvent.CLIENTEVENT_CMD_SERVERSTATISTICS, ClientEvent.CLIENTEVENT_INTERNAL_ERROR,
+    ClientEvent.CLIENTEVENT_SOUNDDEVICE_ADDED, ClientEvent.CLIENTEVENT_SOUNDDEVICE_REMOVED,
+    ClientEvent.CLIENTEVENT_SOUNDDEVICE_UNPLUGGED, ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_INPUT,
+    ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_OUTPUT,
+    ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_INPUT_COMDEVICE,
+    ClientEvent.CLIENTEVENT_SOUNDDEVICE_NEW_DEFAULT_OUTPUT_COMDEVICE,
+]
+
+
+def legacy_dispatch(tt, msg):
+    """Reproduces the old if-chain: every comparison runs for every message."""
+    event = msg.nClientEvent
+    for candidate in LEGACY_EVENT_ORDER:
+        if event == candidate:
+            if candidate == ClientEvent.CLIENTEVENT_CMD_PROCESSING:
+                tt.onCmdProcessing(msg.nSource, not msg.bActive)
+            elif candidate == ClientEvent.CLIENTEVENT_CMD_USER_UPDATE:
+                tt.onCmdUserUpdate(msg.user)
+            elif candidate == ClientEvent.CLIENTEVENT_USER_AUDIOBLOCK:
+                tt.onUserAudioBlock(msg.nSource, msg.nStreamType)
+
+
+def build_stream():
+    events = [
+        ClientEvent.CLIENTEVENT_CMD_USER_UPDATE,
+        ClientEvent.CLIENTEVENT_USER_AUDIOBLOCK,
+        ClientEvent.CLIENTEVENT_CMD_PROCESSING,
+    ]
+    stream = []
+    for i in range(EVENT_COUNT):
+        msg = TTMessage()
+        msg.nClientEvent = events[i % len(events)]
+        msg.nSource = i
+        stream.append(msg)
+    return stream
+
+
+def run(label, dispatch, tt, stream):
+    start = time.perf_counter()
+    for msg in stream:
+        dispatch(tt, msg)
+    elapsed = time.perf_counter() - start
+    print(f"{label}: {len(stream) / elapsed:,.0f} events/s ({tt.handled} handled)")
+
+
+def main():
+    stream = build_stream()
+    run("if-chain", legacy_dispatch, CountingTeamTalk(), stream)
+    run("dispatch table", lambda tt, msg: tt._dispatchMessage(msg), CountingTeamTalk(), stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Measures how long /whoall spends resolving locations for a busy server: the
+old serial, one-request-per-user loop against `IPIntelCache.lookup_many`.
+
+ip-api.com is replaced by a local stand-in that sleeps for a fixed round-trip
+time per request, so the numbers do not depend on the network or the rate limit.
+
+Run from the project root: python benchmarks/ip_lookup.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.ip_intel import IPIntelCache
+
+USER_COUNT = 300
+UNIQUE_IPS = 240
+ROUND_TRIP = 0.05
+
+
+def stand_in_fetch(ip_address):
+    time.sleep(ROUND_TRIP)
+    return {"country": "Country " + ip_address.split(".")[1], "city": "City", "proxy": False}
+
+
+def stand_in_fetch_batch(ip_addresses):
+    time.sleep(ROUND_TRIP)
+    return {ip_address: {"country": "Country " + ip_address.split(".")[1], "city": "City", "proxy": False}
+            for ip_address in ip_addresses}
+
+
+def main():
+    rng = random.Random(1)
+    pool = [f"10.{rng.randint(0, 20)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}" for _ in range(UNIQUE_IPS)]
+    addresses = [rng.choice(pool) for _ in range(USER_COUNT)]
+
+    start = time.perf_counter()
+    for ip_address in addresses:
+        stand_in_fetch(ip_address)
+    serial = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = IPIntelCache(stand_in_fetch, os.path.join(directory, "ip_cache.json"), batch_fetcher=stand_in_fetch_batch)
+        start = time.perf_counter()
+        resolved = cache.lookup_many(addresses)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        cache.lookup_many(addresses)
+        warm = time.perf_counter() - start
+        cache.close()
+
+    print(f"{USER_COUNT} users, {len(set(addresses))} unique IPs, {ROUND_TRIP * 1000:.0f} ms per request")
+    print(f"serial lookups:      {serial:8.3f} s")
+    print(f"lookup_many (cold):  {cold:8.3f} s ({len(resolved)} resolved)")
+    print(f"lookup_many (warm):  {warm * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measures how long it takes to split long command output (e.g. /exec) into
+TeamTalk-sized text messages: the old splitter, which re-sliced the whole
+remaining text for every chunk, against the single-pass `split_text`.
+
+Run from the project root: python benchmarks/message_splitting.py
+Requires the TeamTalk5 SDK library to be loadable (it is imported by TeamTalk5.py).
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.outbox import split_text, text_length
+
+SIZES_MB = (0.25, 1, 4, 16)
+# The old splitter gets slow quickly, so it is only timed on the smaller inputs.
+LEGACY_MAX_MB = 4
+
+
+def legacy_split(message, chunk_size=500):
+    """The splitter the bot used before, kept here for comparison."""
+    chunks = []
+    while message:
+        chunk = message[:chunk_size]
+        message = message[chunk_size:]
+        if message:
+            last_space = chunk.rfind(" ")
+            if last_space != -1:
+                chunk = chunk[:last_space]
+                message = chunk[last_space + 1:] + message
+        chunks.append(chunk)
+    return chunks
+
+
+def build_output(size_bytes, rng):
+    """Something shaped like `ls -l` output, with a few non-ASCII file names."""
+    names = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 16))) for _ in range(200)]
+    names += ["café", "résumé", "файл", "مستند", "データ"]
+    lines = []
+    size = 0
+    while size < size_bytes:
+        line = f"-rw-r--r-- 1 bot bot {rng.randint(0, 10**7):>9} Oct 17 12:00 {rng.choice(names)}.txt"
+        lines.append(line)
+        size += len(line.encode("utf-8")) + 1
+    return "\n".join(lines)
+
+
+def main():
+    rng = random.Random(1)
+    for size_mb in SIZES_MB:
+        output = build_output(int(size_mb * 1024 * 1024), rng)
+
+        start = time.perf_counter()
+        chunks = list(split_text(output))
+        elapsed = time.perf_counter() - start
+        assert all(text_length(chunk) <= 511 for chunk in chunks)
+        line = f"{size_mb:>5} MB: split_text {elapsed * 1000:9.1f} ms ({len(chunks)} chunks)"
+
+        if size_mb <= LEGACY_MAX_MB:
+            start = time.perf_counter()
+            legacy_chunks = legacy_split(output)
+            legacy_elapsed = time.perf_counter() - start
+            oversized = sum(1 for chunk in legacy_chunks if len(chunk.encode("utf-8")) > 511)
+            line += f" | legacy {legacy_elapsed * 1000:9.1f} ms ({len(legacy_chunks)} chunks, {oversized} over the byte limit)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
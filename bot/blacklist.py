@@ -0,0 +1,169 @@
+import os
+import re
+import time
+import unicodedata
+from threading import Lock
+
+# Invisible characters that are removed before matching.
+ZERO_WIDTH_CHARS = "\u00ad\u034f\u061c\u115f\u1160\u17b4\u17b5\u180e\u200b\u200c\u200d\u200e\u200f\u202a\u202b\u202c\u202d\u202e\u2060\u2061\u2062\u2063\u2064\u3164\ufeff"
+
+# Cyrillic and Greek letters that look like Latin ones, folded to the Latin letter.
+CONFUSABLES = {
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+    "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ї": "i", "ј": "j",
+    "ѕ": "s", "ԁ": "d", "ԛ": "q", "ԝ": "w", "ɑ": "a", "ɡ": "g", "ı": "i",
+    "α": "a", "β": "b", "γ": "y", "ε": "e", "η": "n", "ι": "i", "κ": "k", "ν": "v",
+    "ο": "o", "ρ": "p", "τ": "t", "υ": "u", "χ": "x", "ω": "w",
+}
+
+# Leetspeak substitutions, only applied inside tokens that also contain letters
+# so plain numbers such as "455" are left alone.
+LEETSPEAK = {"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b", "9": "g", "@": "a", "$": "s"}
+
+_FOLD_TABLE = str.maketrans({**{char: None for char in ZERO_WIDTH_CHARS}, **CONFUSABLES})
+_LEET_TABLE = str.maketrans(LEETSPEAK)
+_LEET_CHAR = re.compile(r"[\d@$]")
+_LEET_TOKEN = re.compile(r"(?<![\w@$])[\w@$]*[\d@$][\w@$]*")
+_REPEATED_CHARS = re.compile(r"(.)\1{2,}")
+# Three or more single characters separated by spaces or punctuation, e.g. "f u c k" or "f.u.c.k".
+_SPACED_LETTERS = re.compile(r"(?<!\w)(?:\w[\s.\-_*+,~|/\\]+){2,}\w(?!\w)")
+_SPACING = re.compile(r"[\W_]+")
+
+
+def _fold_leetspeak(match):
+    token = match.group(0)
+    if any(char.isalpha() for char in token):
+        return token.translate(_LEET_TABLE)
+    return token
+
+
+def normalize_text(text, collapse_spacing=True):
+    """
+    Normalizes text for blacklist matching in a single pipeline:
+    compatibility decomposition (NFKD) with accents stripped, case folding,
+    zero-width removal and confusable folding, leetspeak folding, collapsing
+    runs of 3+ repeated characters to 2, and joining letter-spaced words.
+    """
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in decomposed if not unicodedata.combining(char))
+    text = text.casefold().translate(_FOLD_TABLE)
+    if _LEET_CHAR.search(text):
+        text = _LEET_TOKEN.sub(_fold_leetspeak, text)
+    text = _REPEATED_CHARS.sub(r"\1\1", text)
+    if collapse_spacing:
+        text = _SPACED_LETTERS.sub(lambda match: _SPACING.sub("", match.group(0)), text)
+    return text
+
+
+class Blacklist:
+    """
+    A compiled matcher for the words in blacklist.txt.
+
+    The file is read and compiled once into a single regular expression built
+    from a trie of the words, so shared prefixes are only tested once per
+    position no matter how long the list grows. The file's modification time
+    is checked at most every `reload_interval` seconds and the matcher is
+    rebuilt when it changes.
+
+    Words and texts both go through `normalize_text`, and every letter in the
+    pattern accepts repeats, so homoglyphs, zero-width characters, leetspeak,
+    letter spacing and stretched words are caught in one pass over the text.
+    Match positions refer to the normalized text.
+    """
+    def __init__(self, filename="blacklist.txt", reload_interval=2.0):
+        self.filename = filename
+        self.reload_interval = reload_interval
+        self.words = []
+        self.pattern = None
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = Lock()
+        self.reload()
+
+    @staticmethod
+    def _trie_pattern(node):
+        """Turns a trie (nested dicts, '' marking the end of a word) into a regex fragment."""
+        alternatives = []
+        optional = False
+        for char in sorted(node):
+            if char == "":
+                optional = True
+                continue
+            piece = r"\s+" if char == " " else re.escape(char) + "+"
+            alternatives.append(piece + Blacklist._trie_pattern(node[char]))
+
+        if not alternatives:
+            return ""
+        if len(alternatives) == 1 and not optional:
+            return alternatives[0]
+        group = "(?:" + "|".join(alternatives) + ")"
+        return group + "?" if optional else group
+
+    @classmethod
+    def compile_words(cls, words):
+        """Compiles a list of words into one case-insensitive, whole-word regex."""
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        if not trie:
+            return None
+        return re.compile(r"\b" + cls._trie_pattern(trie) + r"\b", re.IGNORECASE)
+
+    def _read_words(self):
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                words = (normalize_text(line.strip(), collapse_spacing=False) for line in f if line.strip())
+                return list(dict.fromkeys(words))
+        except FileNotFoundError:
+            return []
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.filename).st_mtime
+        except OSError:
+            return None
+
+    def reload(self):
+        """Reads the file and recompiles the matcher."""
+        with self._lock:
+            self._mtime = self._current_mtime()
+            self._last_check = time.monotonic()
+            words = self._read_words()
+            self.pattern = self.compile_words(words)
+            self.words = words
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        if self._current_mtime() != self._mtime:
+            print(f"{self.filename} changed, reloading blacklist.")
+            self.reload()
+
+    def search(self, text):
+        """Returns the first blacklisted word in `text` as (word, start, end), or None."""
+        self._reload_if_changed()
+        pattern = self.pattern
+        if pattern is None or not text:
+            return None
+        match = pattern.search(normalize_text(text))
+        if match is None:
+            return None
+        return match.group(0).lower(), match.start(), match.end()
+
+    def find_all(self, text):
+        """Returns every blacklisted word in `text` as a list of (word, start, end)."""
+        self._reload_if_changed()
+        pattern = self.pattern
+        if pattern is None or not text:
+            return []
+        return [(match.group(0).lower(), match.start(), match.end()) for match in pattern.finditer(normalize_text(text))]
+
+    def contains(self, *texts):
+        """Returns True if any of the given texts contains a blacklisted word."""
+        return any(self.search(text) for text in texts)
@@ -0,0 +1,133 @@
+from threading import Lock
+from TeamTalk5 import ttstr
+
+
+class ChannelEntry:
+    """What the directory keeps about one channel."""
+    __slots__ = ("channel_id", "parent_id", "name", "path")
+
+    def __init__(self, channel_id, parent_id, name):
+        self.channel_id = channel_id
+        self.parent_id = parent_id
+        self.name = name
+        self.path = None
+
+
+class ChannelDirectory:
+    """
+    An in-memory map of the server's channel tree, so channel paths can be
+    resolved with a dict lookup instead of asking the client every time.
+
+    It is loaded from the channel list after login and kept current from
+    the CHANNEL_NEW, CHANNEL_UPDATE and CHANNEL_REMOVE events. Paths are
+    stored in TeamTalk's form ("/" for the root, "/Lobby/Games/" below it)
+    and looked up with or without the surrounding slashes. Renaming or
+    moving a channel updates the paths of everything under it.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._channels = {}
+        self._children = {}
+        self._by_path = {}
+        self.root_id = 0
+
+    @staticmethod
+    def normalize_path(path):
+        parts = [part for part in path.split("/") if part]
+        return "/" + "".join(f"{part}/" for part in parts)
+
+    def load(self, channels):
+        """Replaces the directory with the given list of ctypes `Channel`s."""
+        with self._lock:
+            self._channels.clear()
+            self._children.clear()
+            self._by_path.clear()
+            self.root_id = 0
+            for channel in channels:
+                self._add(channel)
+
+    def update(self, channel):
+        """Adds a new channel or applies a changed name or parent."""
+        with self._lock:
+            existing = self._channels.get(channel.nChannelID)
+            if existing is None:
+                self._add(channel)
+                return
+            name = ttstr(channel.szName)
+            if existing.name == name and existing.parent_id == channel.nParentID:
+                return
+            self._children.get(existing.parent_id, set()).discard(existing.channel_id)
+            existing.name = name
+            existing.parent_id = channel.nParentID
+            self._children.setdefault(existing.parent_id, set()).add(existing.channel_id)
+            self._set_paths(existing)
+
+    def remove(self, channel_id):
+        """Drops a channel and everything below it."""
+        with self._lock:
+            entry = self._channels.get(channel_id)
+            if entry is None:
+                return
+            self._children.get(entry.parent_id, set()).discard(channel_id)
+            stack = [channel_id]
+            while stack:
+                entry = self._channels.pop(stack.pop(), None)
+                if entry is None:
+                    continue
+                if self._by_path.get(entry.path) == entry.channel_id:
+                    del self._by_path[entry.path]
+                stack.extend(self._children.pop(entry.channel_id, ()))
+            if channel_id == self.root_id:
+                self.root_id = 0
+
+    def clear(self):
+        self.load(())
+
+    def _add(self, channel):
+        """Adds one channel. Must hold the lock."""
+        entry = ChannelEntry(channel.nChannelID, channel.nParentID, ttstr(channel.szName))
+        self._channels[entry.channel_id] = entry
+        if entry.parent_id == 0:
+            self.root_id = entry.channel_id
+        self._children.setdefault(entry.parent_id, set()).add(entry.channel_id)
+        # Children can be listed before their parent; their paths are filled in once it arrives.
+        self._set_paths(entry)
+
+    def _set_paths(self, entry):
+        """Recomputes the path of a channel and its descendants. Must hold the lock."""
+        stack = [entry]
+        while stack:
+            entry = stack.pop()
+            if entry.path is not None and self._by_path.get(entry.path) == entry.channel_id:
+                del self._by_path[entry.path]
+            if entry.parent_id == 0:
+                entry.path = "/"
+            else:
+                parent = self._channels.get(entry.parent_id)
+                entry.path = None if parent is None or parent.path is None else f"{parent.path}{entry.name}/"
+            if entry.path is None:
+                continue
+            self._by_path[entry.path] = entry.channel_id
+            stack.extend(self._channels[child_id] for child_id in self._children.get(entry.channel_id, ()) if child_id in self._channels)
+
+    def get_id(self, path):
+        """Returns the id of the channel at `path`, or 0 if it is not known."""
+        return self._by_path.get(self.normalize_path(path), 0)
+
+    def get_path(self, channel_id):
+        entry = self._channels.get(channel_id)
+        return entry.path if entry is not None else None
+
+    def get_parent_id(self, channel_id):
+        entry = self._channels.get(channel_id)
+        return entry.parent_id if entry is not None else 0
+
+    def get_children(self, channel_id):
+        with self._lock:
+            return list(self._children.get(channel_id, ()))
+
+    def __contains__(self, channel_id):
+        return channel_id in self._channels
+
+    def __len__(self):
+        return len(self._channels)
@@ -1,60 +1,113 @@
 import shlex
-from TeamTalk5 import TextMessage, UserType, ttstr
+import time
+from TeamTalk5 import TextMessage, ttstr
 
 class Command:
-    def __init__(self, name, handler, admin_only=False, help_text=""):
+    def __init__(self, name, handler, admin_only=False, help_text="", aliases=()):
         self.name = name
         self.handler = handler
         self.admin_only = admin_only
         self.help_text = help_text
+        self.aliases = tuple(aliases)
+
+class CommandTiming:
+    """Call count and time spent in one command or prefix handler."""
+    def __init__(self):
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, elapsed):
+        self.calls += 1
+        self.total_seconds += elapsed
+        if elapsed > self.max_seconds:
+            self.max_seconds = elapsed
 
 class CommandHandler:
+    """
+    Routes incoming text messages in one pass: the first character is looked
+    up in a table of prefixes (the command prefix, plus any registered with
+    `register_prefix`, such as ' for speech or + and - for seeking), and the
+    matching handler gets the rest of the message. Commands and aliases are
+    resolved with one dict lookup, arguments are only parsed with shlex when
+    the message contains quotes, and the time spent in every handler is
+    recorded in `timings`.
+    """
     def __init__(self, bot, prefix='/'):
         self.bot = bot
         self.prefix = prefix
         self.commands = {}
+        self.aliases = {}
+        self.prefix_handlers = {prefix: self._handle_command}
+        self.timings = {}
+
+    def register_command(self, name, handler, admin_only=False, help_text="", aliases=()):
+        command = Command(name, handler, admin_only, help_text, aliases)
+        self.commands[name] = command
+        self.aliases[name] = command
+        for alias in command.aliases:
+            self.aliases[alias] = command
 
-    def register_command(self, name, handler, admin_only=False, help_text=""):
-        self.commands[name] = Command(name, handler, admin_only, help_text)
+    def register_prefix(self, prefix, handler):
+        """Routes messages starting with the single character `prefix` to `handler(textmessage, rest_of_message)`."""
+        self.prefix_handlers[prefix] = handler
 
     def _is_authorized_user(self, textmessage: TextMessage):
-        sender_username = ttstr(textmessage.szFromUsername)
-        authorized_users = [u.strip() for u in self.bot.accounts_config.get("authorized_users", [])]
-        if sender_username in authorized_users:
-            return True
-        if self.bot.accounts_config.get('detect_server_admins', False):
-            sender_user = self.bot.getUser(textmessage.nFromUserID)
-            if sender_user and sender_user.uUserType == UserType.USERTYPE_ADMIN:
-                return True
-        return False
-
-    def handle_message(self, textmessage: TextMessage):
-        message_text = ttstr(textmessage.szMessage)
-        if not message_text.startswith(self.prefix):
-            return
+        return self.bot.permissions.is_authorized(textmessage.nFromUserID, ttstr(textmessage.szFromUsername))
 
+    @staticmethod
+    def parse_arguments(text):
+        """Splits command arguments on whitespace, honouring quotes only when there are any."""
+        if '"' not in text and "'" not in text:
+            return text.split()
         try:
-            # shlex helps with quoted arguments
-            parts = shlex.split(message_text)
-            command_name = parts[0][len(self.prefix):].lower()
-            args = parts[1:]
+            return shlex.split(text)
         except ValueError:
-            # Fallback for simple splitting if shlex fails
-            parts = message_text.split()
-            command_name = parts[0][len(self.prefix):].lower()
-            args = parts[1:]
+            # Fallback for simple splitting if the quotes don't balance
+            return text.split()
+
+    def _time(self, key, handler, *args):
+        start = time.perf_counter()
+        try:
+            return handler(*args)
+        finally:
+            timing = self.timings.get(key)
+            if timing is None:
+                timing = self.timings[key] = CommandTiming()
+            timing.record(time.perf_counter() - start)
 
-        if command_name in self.commands:
-            command = self.commands[command_name]
-            is_authorized = self._is_authorized_user(textmessage)
+    def route(self, textmessage: TextMessage, message_text=None):
+        """Dispatches a message by its first character. Returns True if a prefix handler took it."""
+        if message_text is None:
+            message_text = ttstr(textmessage.szMessage)
+        if not message_text:
+            return False
+        handler = self.prefix_handlers.get(message_text[0])
+        if handler is None:
+            return False
+        if handler == self._handle_command:
+            handler(textmessage, message_text[1:])
+        else:
+            self._time(message_text[0], handler, textmessage, message_text[1:])
+        return True
 
-            if getattr(self.bot, "commands_locked", False) and not is_authorized:
-                self.bot.privateMessage(textmessage.nFromUserID, self.bot._("Commands are locked. Admins only."))
-                return
+    def _handle_command(self, textmessage: TextMessage, text):
+        if not text[:1] or text[:1].isspace():
+            return # "/ kick" has an empty command name, as it always did
+        parts = text.split(None, 1)
+        command = self.aliases.get(parts[0].lower())
+        if command is None:
+            return
 
-            # Check for admin_only commands
-            if command.admin_only and not is_authorized:
-                self.bot.privateMessage(textmessage.nFromUserID, self.bot._("This command is for authorized users only."))
-                return
+        is_authorized = self._is_authorized_user(textmessage)
+        if getattr(self.bot, "commands_locked", False) and not is_authorized:
+            self.bot.privateMessage(textmessage.nFromUserID, self.bot._("Commands are locked. Admins only."))
+            return
+
+        # Check for admin_only commands
+        if command.admin_only and not is_authorized:
+            self.bot.privateMessage(textmessage.nFromUserID, self.bot._("This command is for authorized users only."))
+            return
 
-            command.handler(textmessage, *args)
+        arguments = self.parse_arguments(parts[1]) if len(parts) > 1 else []
+        self._time(command.name, command.handler, textmessage, *arguments)
@@ -0,0 +1,146 @@
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+
+
+class CommandError(Exception):
+    """The server rejected a command (CMD_ERROR), or it could not be sent."""
+    def __init__(self, error_number, message):
+        super().__init__(f"{message} (error {error_number})")
+        self.error_number = error_number
+        self.message = message
+
+
+class CommandTimeout(CommandError):
+    """No CMD_SUCCESS or CMD_ERROR arrived for a command within the tracker's timeout."""
+    def __init__(self, timeout):
+        super().__init__(-1, f"No reply from the server after {timeout} seconds")
+
+
+class _Unclaimed:
+    """What arrived for a command id before anyone called track() for it."""
+    def __init__(self):
+        self.replies = []
+        self.done = False
+        self.error = None
+
+
+class CommandTracker:
+    """
+    Correlates the command ids returned by `do*` calls with the server's
+    CMD_PROCESSING / CMD_SUCCESS / CMD_ERROR replies.
+
+    `track(cmd_id)` returns a `concurrent.futures.Future`. While the server
+    processes the command (between the two CMD_PROCESSING events), every
+    object passed to `add_reply()` - user accounts for doListUserAccounts,
+    the new channel for doMakeChannel, ... - is collected for it. On
+    CMD_SUCCESS the future resolves to that list of replies; on CMD_ERROR
+    it raises `CommandError`. Callers can block on `result(timeout)` or
+    chain the next step with `add_done_callback` instead of polling.
+    Commands that get no reply within `timeout` seconds fail with
+    `CommandTimeout` when `expire()` runs.
+    """
+    # Commands nobody has tracked (yet), kept in case their reply wins the race with track().
+    UNCLAIMED_LIMIT = 256
+
+    def __init__(self, timeout=10.0):
+        self.timeout = timeout
+        self._lock = Lock()
+        self._pending = {}
+        self._unclaimed = OrderedDict()
+        self._processing_id = None
+
+    def track(self, cmd_id, name=None):
+        """Returns a future for the command with the given id (as returned by a do* call)."""
+        future = Future()
+        future.cmd_id = cmd_id
+        future.name = name or "command"
+        future.replies = []
+        if cmd_id is None or cmd_id < 0:
+            future.set_exception(CommandError(-1, f"Could not send {future.name}"))
+            return future
+        with self._lock:
+            unclaimed = self._unclaimed.pop(cmd_id, None)
+            if unclaimed is not None:
+                future.replies.extend(unclaimed.replies)
+            if unclaimed is None or not unclaimed.done:
+                self._pending[cmd_id] = (future, time.monotonic() + self.timeout)
+                return future
+        self._resolve(future, unclaimed.error)
+        return future
+
+    @staticmethod
+    def _resolve(future, error):
+        if future.done():
+            return
+        if error is None:
+            future.set_result(future.replies)
+        else:
+            future.set_exception(error)
+
+    def _unclaimed_entry(self, cmd_id):
+        """Returns the unclaimed record for an id, creating it if needed. Must hold the lock."""
+        unclaimed = self._unclaimed.get(cmd_id)
+        if unclaimed is None:
+            unclaimed = self._unclaimed[cmd_id] = _Unclaimed()
+            while len(self._unclaimed) > self.UNCLAIMED_LIMIT:
+                self._unclaimed.popitem(last=False)
+        return unclaimed
+
+    def on_processing(self, cmd_id, complete):
+        """Marks the start (complete=False) or end (complete=True) of the server's reply to a command."""
+        with self._lock:
+            self._processing_id = None if complete else cmd_id
+
+    def add_reply(self, item):
+        """Attaches an object received while a command's reply is being processed to that command."""
+        with self._lock:
+            cmd_id = self._processing_id
+            if cmd_id is None:
+                return
+            entry = self._pending.get(cmd_id)
+            if entry is not None:
+                entry[0].replies.append(item)
+            else:
+                self._unclaimed_entry(cmd_id).replies.append(item)
+
+    def _complete(self, cmd_id, error):
+        with self._lock:
+            entry = self._pending.pop(cmd_id, None)
+            if entry is None:
+                unclaimed = self._unclaimed_entry(cmd_id)
+                unclaimed.done = True
+                unclaimed.error = error
+                return
+        self._resolve(entry[0], error)
+
+    def on_success(self, cmd_id):
+        self._complete(cmd_id, None)
+
+    def on_error(self, cmd_id, error_number, message):
+        self._complete(cmd_id, CommandError(error_number, message))
+
+    def expire(self):
+        """Fails every command whose reply is overdue."""
+        now = time.monotonic()
+        with self._lock:
+            overdue = [cmd_id for cmd_id, (_, deadline) in self._pending.items() if deadline <= now]
+            entries = [self._pending.pop(cmd_id) for cmd_id in overdue]
+        for future, _ in entries:
+            logging.error(f"Command {future.cmd_id} ({future.name}) timed out after {self.timeout} seconds.")
+            self._resolve(future, CommandTimeout(self.timeout))
+
+    def fail_all(self, reason):
+        """Fails every pending command, e.g. when the connection is lost and command ids start over."""
+        with self._lock:
+            entries = list(self._pending.values())
+            self._pending.clear()
+            self._unclaimed.clear()
+            self._processing_id = None
+        for future, _ in entries:
+            self._resolve(future, CommandError(-1, reason))
+
+    def __len__(self):
+        return len(self._pending)
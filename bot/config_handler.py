@@ -76,6 +76,8 @@ class ConfigHandler:
             {'section': 'bot', 'key': 'char_limit_mode', 'type': 'choice', 'prompt': self._("Action for Long Nicknames"), 'help_text': self._("What to do when a user's nickname exceeds the character limit."), 'options': {'Kick the user': '1', 'Ban the user': '2'}, 'default': 'Kick the user'},
             {'section': 'bot', 'key': 'blacklist_mode', 'type': 'choice', 'prompt': self._("Action for Blacklisted Words"), 'help_text': self._("What to do when a user uses a word from blacklist.txt in their name or messages."), 'options': {'Kick the user': '1', 'Ban the user': '2'}, 'default': 'Kick the user'},
             {'section': 'bot', 'key': 'banned_countries', 'type': 'text', 'prompt': self._("Banned Countries"), 'help_text': self._("A comma-separated list of country names to ban from the server (e.g., North Korea,Israel).")},
+            {'section': 'bot', 'key': 'geoip_database', 'type': 'text', 'prompt': self._("GeoIP Database Path"), 'help_text': self._("Optional path to a local GeoIP database (.mmdb, or a .csv of 'network,country,city' rows) used for locations and country bans without network requests.")},
+            {'section': 'bot', 'key': 'geoip_remote_fallback', 'type': 'bool', 'prompt': self._("Use Online Lookups as a Fallback?"), 'help_text': self._("Look up addresses that are not in the local GeoIP database with the online service (ip-api.com)."), 'default': True},
             {'section': 'bot', 'key': 'video_deletion_timer', 'type': 'int', 'prompt': self._("Uploaded Video Deletion Timer (minutes)"), 'help_text': self._("Time in minutes before a downloaded/uploaded video is automatically deleted from the server channel. Set to 0 to disable."), 'default': 15},
 
             {'type': 'header', 'text': self._("Jail System")},
@@ -84,6 +86,11 @@ class ConfigHandler:
             {'section': 'bot', 'key': 'jail_channel', 'type': 'text', 'prompt': self._("Jail Channel Path"), 'help_text': self._("The full path to the channel where jailed users will be moved."), 'default': "/jail"},
             {'section': 'bot', 'key': 'jail_timer_seconds', 'type': 'int', 'prompt': self._("Jail Flood Timer (seconds)"), 'help_text': self._("The time window in seconds to monitor a jailed user for spamming join attempts."), 'default': 10},
             {'section': 'bot', 'key': 'jail_flood_count', 'type': 'int', 'prompt': self._("Jail Flood Count"), 'help_text': self._("Number of join attempts within the timer window that will trigger a ban."), 'default': 5},
+            {'section': 'bot', 'key': 'flood_protection', 'type': 'bool', 'prompt': self._("Enable Flood Protection?"), 'help_text': self._("Warn and then kick users who switch channels or send channel messages too quickly. Authorized users are never kicked."), 'default': False},
+            {'section': 'bot', 'key': 'rejoin_flood_count', 'type': 'int', 'prompt': self._("Channel Switch Flood Count"), 'help_text': self._("Number of channel joins within the channel switch window that gets a user kicked."), 'default': 10},
+            {'section': 'bot', 'key': 'rejoin_flood_seconds', 'type': 'int', 'prompt': self._("Channel Switch Window (seconds)"), 'help_text': self._("The time window in seconds in which channel joins are counted."), 'default': 30},
+            {'section': 'bot', 'key': 'message_flood_count', 'type': 'int', 'prompt': self._("Channel Message Flood Count"), 'help_text': self._("Number of channel messages within the message window that gets a user kicked."), 'default': 10},
+            {'section': 'bot', 'key': 'message_flood_seconds', 'type': 'int', 'prompt': self._("Channel Message Window (seconds)"), 'help_text': self._("The time window in seconds in which channel messages are counted."), 'default': 5},
 
             {'type': 'header', 'text': self._("Exclusions (Immunity)")},
             {'section': 'exclusion', 'key': 'ips', 'type': 'text', 'prompt': self._("Excluded IP Addresses"), 'help_text': self._("Comma-separated list of IP addresses immune to moderation rules. The stats IP is excluded by default."), 'default': '139.144.24.23'},
@@ -456,12 +463,19 @@ class ConfigHandler:
                 "jail_channel": bot_section.get("jail_channel", "/jail"),
                 "jail_timer_seconds": bot_section.getint("jail_timer_seconds", 10),
                 "jail_flood_count": bot_section.getint("jail_flood_count", 5),
+                "flood_protection": bot_section.getboolean("flood_protection", False),
+                "rejoin_flood_count": bot_section.getint("rejoin_flood_count", 10),
+                "rejoin_flood_seconds": bot_section.getint("rejoin_flood_seconds", 30),
+                "message_flood_count": bot_section.getint("message_flood_count", 10),
+                "message_flood_seconds": bot_section.getint("message_flood_seconds", 5),
                 "random_message_interval": bot_section.getint("random_message_interval", 0),
                 "char_limit": bot_section.getint("char_limit", 0),
                 "char_limit_mode": bot_section.getint("char_limit_mode", 1),
                 "blacklist_mode": bot_section.getint("blacklist_mode", 1),
                 "video_deletion_timer": bot_section.getint("video_deletion_timer", 15),
                 "banned_countries": [c.strip() for c in bot_section.get("banned_countries", "").split(",") if c.strip()],
+                "geoip_database": bot_section.get("geoip_database", ""),
+                "geoip_remote_fallback": bot_section.getboolean("geoip_remote_fallback", True),
             }
         except (configparser.Error, KeyError, ValueError) as e:
             print(self._("Config file error in [bot] section: {e}. Please delete config.ini and run again.").format(e=e))
@@ -588,12 +602,19 @@ class ConfigHandler:
                 "jail_channel": str(bot_config["jail_channel"]),
                 "jail_timer_seconds": str(bot_config["jail_timer_seconds"]),
                 "jail_flood_count": str(bot_config["jail_flood_count"]),
+                "flood_protection": str(bot_config.get("flood_protection", False)),
+                "rejoin_flood_count": str(bot_config.get("rejoin_flood_count", 10)),
+                "rejoin_flood_seconds": str(bot_config.get("rejoin_flood_seconds", 30)),
+                "message_flood_count": str(bot_config.get("message_flood_count", 10)),
+                "message_flood_seconds": str(bot_config.get("message_flood_seconds", 5)),
                 "random_message_interval": str(bot_config["random_message_interval"]),
                 "char_limit": str(bot_config["char_limit"]),
                 "char_limit_mode": str(bot_config["char_limit_mode"]),
                 "blacklist_mode": str(bot_config["blacklist_mode"]),
                 "video_deletion_timer": str(bot_config["video_deletion_timer"]),
                 "banned_countries": ",".join(bot_config["banned_countries"]),
+                "geoip_database": str(bot_config.get("geoip_database", "")),
+                "geoip_remote_fallback": str(bot_config.get("geoip_remote_fallback", True)),
             }
             with open(self.config_file, "w", encoding="utf-8") as configfile:
                 self.config.write(configfile)
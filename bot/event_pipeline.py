@@ -0,0 +1,111 @@
+import logging
+import queue
+import threading
+import time
+import traceback
+from collections import namedtuple
+
+# An immutable copy of the fields the bot reads from a TeamTalk `User`.
+# The field names mirror the ctypes structure so handlers can use either one.
+UserSnapshot = namedtuple("UserSnapshot", [
+    "nUserID", "szUsername", "szNickname", "szIPAddress", "nChannelID",
+    "uUserType", "szStatusMsg", "szClientName", "captured_at",
+])
+
+
+def snapshot_user(user):
+    """Copies a ctypes `User` into a `UserSnapshot` so it can safely leave the event thread."""
+    return UserSnapshot(
+        nUserID=user.nUserID,
+        szUsername=user.szUsername,
+        szNickname=user.szNickname,
+        szIPAddress=user.szIPAddress,
+        nChannelID=user.nChannelID,
+        uUserType=user.uUserType,
+        szStatusMsg=user.szStatusMsg,
+        szClientName=user.szClientName,
+        captured_at=time.time(),
+    )
+
+
+class EventLane:
+    """
+    A FIFO queue of event handlers served by a fixed number of worker threads.
+    A lane with a single worker processes its events strictly in order.
+    """
+    def __init__(self, name, workers=1):
+        self.name = name
+        self.queue = queue.Queue()
+        self.processed = 0
+        self.failed = 0
+        self.peak_depth = 0
+        self._stats_lock = threading.Lock()
+        self._threads = []
+        for index in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"TTBot_Lane_{name}_{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, handler, *args):
+        """Queues `handler(*args)` to run on one of the lane's workers."""
+        self.queue.put((handler, args))
+        depth = self.queue.qsize()
+        if depth > self.peak_depth:
+            self.peak_depth = depth
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            handler, args = item
+            try:
+                handler(*args)
+                with self._stats_lock:
+                    self.processed += 1
+            except Exception:
+                with self._stats_lock:
+                    self.failed += 1
+                logging.error(f"Exception in event lane '{self.name}' for handler '{handler.__name__}':\n{traceback.format_exc()}")
+
+    def get_metrics(self):
+        return {
+            "depth": self.queue.qsize(),
+            "peak_depth": self.peak_depth,
+            "processed": self.processed,
+            "failed": self.failed,
+            "workers": len(self._threads),
+        }
+
+    def shutdown(self):
+        """Stops the workers once they have drained the events already queued."""
+        for _ in self._threads:
+            self.queue.put(None)
+
+
+class EventPipeline:
+    """
+    Routes decoded events away from the TeamTalk event thread.
+
+    - moderation: a single ordered worker for fast checks (kicks, bans, jail).
+    - enrichment: several workers for slow, network-bound work (geolocation, notifications).
+    """
+    MODERATION = "moderation"
+    ENRICHMENT = "enrichment"
+
+    def __init__(self, enrichment_workers=4):
+        self.lanes = {
+            self.MODERATION: EventLane(self.MODERATION, workers=1),
+            self.ENRICHMENT: EventLane(self.ENRICHMENT, workers=enrichment_workers),
+        }
+
+    def submit(self, lane_name, handler, *args):
+        self.lanes[lane_name].submit(handler, *args)
+
+    def get_metrics(self):
+        """Returns a dict of lane name to that lane's queue metrics."""
+        return {name: lane.get_metrics() for name, lane in self.lanes.items()}
+
+    def shutdown(self):
+        for lane in self.lanes.values():
+            lane.shutdown()
@@ -0,0 +1,239 @@
+import bisect
+import csv
+import ipaddress
+import json
+import logging
+import mmap
+import os
+import struct
+import traceback
+
+try:
+    import maxminddb
+except ImportError:
+    maxminddb = None
+
+
+def _address_key(ip_address):
+    """Returns a 16-byte big-endian key for an address; IPv4 is mapped into the IPv6 space."""
+    address = ipaddress.ip_address(ip_address)
+    if address.version == 4:
+        address = ipaddress.IPv6Address(b"\0" * 10 + b"\xff\xff" + address.packed)
+    return address.packed
+
+
+class MMDBDatabase:
+    """
+    Looks up locations in a MaxMind-style .mmdb file (GeoLite2, DB-IP, ...)
+    through the optional `maxminddb` package, with the file memory-mapped.
+    """
+    def __init__(self, path):
+        if maxminddb is None:
+            raise ImportError("The maxminddb package is required to read .mmdb files (pip install maxminddb).")
+        self.path = path
+        self._reader = maxminddb.open_database(path, maxminddb.MODE_MMAP)
+
+    def lookup(self, ip_address):
+        """Returns {"country": ..., "city": ...} for an address, or None if it isn't in the database."""
+        try:
+            record = self._reader.get(ip_address)
+        except ValueError:
+            return None
+        if not record:
+            return None
+        country = record.get("country") or record.get("registered_country") or {}
+        city = record.get("city") or {}
+        return {"country": country.get("names", {}).get("en"), "city": city.get("names", {}).get("en")}
+
+    def close(self):
+        self._reader.close()
+
+
+class CIDRDatabase:
+    """
+    Looks up locations in a CSV file of address ranges. Each row is either
+    `network,country,city` (e.g. `1.0.0.0/24,Australia,Sydney`) or
+    `first_ip,last_ip,country,city`; the city may be left empty.
+
+    The CSV is compiled once into a sorted array of fixed-size
+    (start, end, location) records saved next to it as `<path>.idx`, and
+    rebuilt whenever the CSV is newer. The index is memory-mapped and
+    searched with a binary search, so a lookup only touches a few records
+    and the table is never loaded into Python objects.
+    """
+    MAGIC = b"TTGEOIP1"
+    HEADER = struct.Struct(">8sII")
+    RECORD = struct.Struct(">16s16sI")
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+        if self._index_is_stale():
+            self.compile(path, self.index_path)
+        self._file = open(self.index_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, _ = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC:
+            self.close()
+            raise ValueError(f"{self.index_path} is not a GeoIP index")
+        self._records_offset = self.HEADER.size
+        locations_offset = self._records_offset + self._count * self.RECORD.size
+        self.locations = json.loads(self._map[locations_offset:].decode("utf-8"))
+
+    def _index_is_stale(self):
+        try:
+            return os.path.getmtime(self.index_path) < os.path.getmtime(self.path)
+        except OSError:
+            return True
+
+    @classmethod
+    def compile(cls, csv_path, index_path):
+        """Compiles a CSV of ranges into a sorted binary index."""
+        ranges = []
+        locations = []
+        location_ids = {}
+        with open(csv_path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                try:
+                    if len(row) >= 4 and "/" not in row[0]:
+                        start, end = _address_key(row[0].strip()), _address_key(row[1].strip())
+                        country, city = row[2].strip(), row[3].strip()
+                    else:
+                        network = ipaddress.ip_network(row[0].strip(), strict=False)
+                        start, end = _address_key(network[0]), _address_key(network[-1])
+                        country, city = row[1].strip(), row[2].strip() if len(row) > 2 else ""
+                except (ValueError, IndexError):
+                    continue # Header or malformed row
+                location = (country, city)
+                if location not in location_ids:
+                    location_ids[location] = len(locations)
+                    locations.append(location)
+                ranges.append((start, end, location_ids[location]))
+        ranges.sort()
+
+        temp_path = index_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, len(ranges), len(locations)))
+            for record in ranges:
+                f.write(cls.RECORD.pack(*record))
+            f.write(json.dumps(locations).encode("utf-8"))
+        os.replace(temp_path, index_path)
+        print(f"Compiled {len(ranges)} address ranges from {csv_path}.")
+
+    def _start_at(self, position):
+        offset = self._records_offset + position * self.RECORD.size
+        return self._map[offset:offset + 16]
+
+    def lookup(self, ip_address):
+        """Returns {"country": ..., "city": ...} for an address, or None if it isn't in any range."""
+        try:
+            key = _address_key(ip_address)
+        except ValueError:
+            return None
+        # The last range starting at or before the address is the only one that can contain it.
+        position = bisect.bisect_right(_RecordStarts(self), key) - 1
+        if position < 0:
+            return None
+        _, end, location_id = self.RECORD.unpack_from(self._map, self._records_offset + position * self.RECORD.size)
+        if key > end:
+            return None
+        country, city = self.locations[location_id]
+        return {"country": country or None, "city": city or None}
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class _RecordStarts:
+    """A read-only sequence view of the start addresses in a CIDRDatabase index, for bisect."""
+    def __init__(self, database):
+        self._database = database
+
+    def __len__(self):
+        return self._database._count
+
+    def __getitem__(self, position):
+        return self._database._start_at(position)
+
+
+def open_geoip_database(path):
+    """
+    Opens a local GeoIP database, choosing the reader from the file extension
+    (.mmdb or .csv). Returns None if no path is configured or it can't be opened.
+    """
+    if not path:
+        return None
+    if not os.path.exists(path):
+        print(f"GeoIP database {path} not found, using the online lookup service only.")
+        return None
+    try:
+        if path.lower().endswith(".mmdb"):
+            return MMDBDatabase(path)
+        return CIDRDatabase(path)
+    except Exception as e:
+        logging.error(f"Could not open GeoIP database {path}:\n{traceback.format_exc()}")
+        print(f"Could not open GeoIP database {path}: {e}")
+        return None
+
+
+class GeoLocator:
+    """
+    Resolves IP addresses to locations, from the local GeoIP `database` when
+    one is configured and from the online lookup service (an `IPIntelCache`)
+    as a fallback. With `remote_fallback` disabled, only the local database
+    and already cached online answers are used.
+    """
+    def __init__(self, database=None, remote=None, remote_fallback=True):
+        self.database = database
+        self.remote = remote
+        self.remote_fallback = remote_fallback
+
+    def lookup(self, ip_address, allow_remote=True):
+        """
+        Returns {"country": ..., "city": ...} for an address, or None.
+        With allow_remote=False no network request is made, so the call is
+        safe wherever a login must not wait.
+        """
+        if self.database:
+            info = self.database.lookup(ip_address)
+            if info and info.get("country"):
+                return info
+        if not self.remote:
+            return None
+        if allow_remote and self.remote_fallback:
+            return self.remote.lookup(ip_address)
+        return self.remote.peek(ip_address)[1]
+
+    def get_location(self, ip_address, allow_remote=True):
+        """Returns (country, city) for an address, or (None, None)."""
+        info = self.lookup(ip_address, allow_remote)
+        if not info:
+            return None, None
+        return info.get("country"), info.get("city")
+
+    def lookup_many(self, ip_addresses, timeout=10.0):
+        """Resolves many addresses at once; see `IPIntelCache.lookup_many`. Returns a dict of address -> info."""
+        results = {}
+        missing = []
+        for ip_address in dict.fromkeys(ip_addresses):
+            info = self.database.lookup(ip_address) if self.database else None
+            if info and info.get("country"):
+                results[ip_address] = info
+            else:
+                missing.append(ip_address)
+        if not missing or not self.remote:
+            return results
+        if self.remote_fallback:
+            results.update(self.remote.lookup_many(missing, timeout=timeout))
+        else:
+            # Like lookup(): answers the online service already gave are still used.
+            for ip_address in missing:
+                found, info = self.remote.peek(ip_address)
+                if found:
+                    results[ip_address] = info
+        return results
+
+    def close(self):
+        if self.database:
+            self.database.close()
@@ -0,0 +1,234 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class RateLimited(Exception):
+    """
+    Raised by a fetcher when the IP lookup service asks us to slow down.
+    If the request that hit the limit was still answered (its answer used up
+    the last request of the window), the answer is passed as `result` so it
+    can be kept; `has_result` tells it apart from an answer of None.
+    """
+    def __init__(self, retry_after, result=None, has_result=False):
+        super().__init__(f"Rate limited, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+        self.result = result
+        self.has_result = has_result
+
+
+class IPIntelCache:
+    """
+    An IP-keyed cache of geolocation and proxy information shared by the
+    welcome messages, /who, /weather and VPN detection.
+
+    - Successful lookups are kept for `ttl` seconds, failed ones (private or
+      invalid addresses) for `negative_ttl` seconds.
+    - At most `max_entries` addresses are kept; the least recently used is
+      evicted first.
+    - The cache is saved to `path` as JSON and reloaded on startup.
+    - While the lookup service reports its rate limit as exhausted, misses
+      return None instead of making requests.
+
+    `fetcher(ip_address)` must return a dict with "country", "city" and
+    "proxy" keys, None if the service answered that the address can't be
+    resolved, raise `RateLimited`, or raise any other exception on a
+    network error (which is not cached). The optional
+    `batch_fetcher(ip_addresses)` resolves up to `batch_size` addresses in
+    one request and returns a dict mapping each address to the same kind of
+    result; `lookup_many` uses it when given, and `fetcher` otherwise.
+    """
+    LOCAL_ADDRESSES = ("", "127.0.0.1", "::1")
+
+    def __init__(self, fetcher, path="ip_cache.json", ttl=7 * 86400, negative_ttl=3600, max_entries=20000,
+                 batch_fetcher=None, batch_size=100, batch_workers=4):
+        self.fetcher = fetcher
+        self.batch_fetcher = batch_fetcher
+        self.batch_size = batch_size
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._blocked_until = 0.0
+        self._dirty = False
+        self._batch_pool = ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix="TTBot_IPLookup")
+        self.load()
+
+    def _store(self, ip_address, info):
+        expires_at = time.time() + (self.ttl if info is not None else self.negative_ttl)
+        with self._lock:
+            self._entries[ip_address] = {"info": info, "expires_at": expires_at}
+            self._entries.move_to_end(ip_address)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def peek(self, ip_address):
+        """
+        Returns (found, info) from the cache without making a request.
+        `found` is False on a miss; `info` is None for a cached negative result.
+        """
+        with self._lock:
+            entry = self._entries.get(ip_address)
+            if entry is None:
+                return False, None
+            if entry["expires_at"] <= time.time():
+                del self._entries[ip_address]
+                return False, None
+            self._entries.move_to_end(ip_address)
+            return True, entry["info"]
+
+    def lookup(self, ip_address):
+        """Returns the cached or freshly fetched info dict for an IP address, or None."""
+        if ip_address in self.LOCAL_ADDRESSES:
+            return {"country": "Local", "city": "Host", "proxy": False}
+
+        found, info = self.peek(ip_address)
+        if found:
+            self.hits += 1
+            return info
+        self.misses += 1
+
+        # Only one thread fetches a given address; the others wait for its answer.
+        with self._lock:
+            event = self._in_flight.get(ip_address)
+            is_owner = event is None
+            if is_owner:
+                event = self._in_flight[ip_address] = threading.Event()
+        if not is_owner:
+            event.wait(timeout=10)
+            return self.peek(ip_address)[1]
+
+        try:
+            if time.time() < self._blocked_until:
+                return None
+            try:
+                info = self.fetcher(ip_address)
+            except RateLimited as e:
+                self._blocked_until = time.time() + e.retry_after
+                print(f"IP lookups are rate limited for {e.retry_after} seconds.")
+                if not e.has_result:
+                    return None
+                info = e.result
+            except Exception as e:
+                print(f"Error looking up {ip_address}: {e}")
+                return None
+            self._store(ip_address, info)
+            return info
+        finally:
+            with self._lock:
+                del self._in_flight[ip_address]
+            event.set()
+
+    def _fetch_batch(self, ip_addresses):
+        if time.time() < self._blocked_until:
+            return {}
+        try:
+            results = self.batch_fetcher(ip_addresses)
+        except RateLimited as e:
+            self._blocked_until = time.time() + e.retry_after
+            print(f"IP lookups are rate limited for {e.retry_after} seconds.")
+            if not e.has_result:
+                return {}
+            results = e.result
+        except Exception as e:
+            print(f"Error looking up a batch of {len(ip_addresses)} addresses: {e}")
+            return {}
+        for ip_address, info in results.items():
+            self._store(ip_address, info)
+        return results
+
+    def lookup_many(self, ip_addresses, timeout=10.0):
+        """
+        Resolves many addresses at once and returns a dict of address -> info.
+
+        Duplicates are looked up once and cached answers are used first. The
+        remaining addresses are resolved concurrently (in batches when a
+        `batch_fetcher` is set). Addresses that could not be resolved within
+        `timeout` seconds are left out of the result; their lookups keep
+        running in the background and land in the cache for next time.
+        """
+        results = {}
+        missing = []
+        for ip_address in dict.fromkeys(ip_addresses):
+            if ip_address in self.LOCAL_ADDRESSES:
+                results[ip_address] = self.lookup(ip_address)
+                continue
+            found, info = self.peek(ip_address)
+            if found:
+                self.hits += 1
+                results[ip_address] = info
+            else:
+                missing.append(ip_address)
+        if not missing or time.time() < self._blocked_until:
+            return results
+        self.misses += len(missing)
+
+        if self.batch_fetcher:
+            futures = [self._batch_pool.submit(self._fetch_batch, missing[i:i + self.batch_size])
+                       for i in range(0, len(missing), self.batch_size)]
+        else:
+            futures = [self._batch_pool.submit(lambda ip: {ip: self.lookup(ip)}, ip_address) for ip_address in missing]
+        done, _ = wait(futures, timeout=timeout)
+        for future in done:
+            results.update(future.result())
+        return results
+
+    def get_location(self, ip_address):
+        """Returns (country, city) for an IP address, or (None, None)."""
+        info = self.lookup(ip_address)
+        if not info:
+            return None, None
+        return info.get("country"), info.get("city")
+
+    def is_proxy(self, ip_address):
+        """Returns True if the address is known to be a VPN or proxy."""
+        info = self.lookup(ip_address)
+        return bool(info and info.get("proxy"))
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not read IP cache {self.path}: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for ip_address, entry in data.items():
+                if entry.get("expires_at", 0) > now:
+                    self._entries[ip_address] = entry
+
+    def save(self):
+        """Writes the cache to disk if it changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self._entries)
+            self._dirty = False
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.error(f"Could not save IP cache {self.path}: {e}")
+
+    def close(self):
+        """Saves the cache and stops the lookup threads."""
+        self.save()
+        self._batch_pool.shutdown(wait=False)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import time
+from threading import Lock
+
+
+class LoginWatch:
+    """One request to be told on Telegram when a nickname or username logs in."""
+    __slots__ = ("kind", "name", "chat_id", "requested_by", "expires_at")
+
+    def __init__(self, kind, name, chat_id, requested_by=None, expires_at=None):
+        self.kind = kind
+        self.name = name
+        self.chat_id = chat_id
+        self.requested_by = requested_by
+        self.expires_at = expires_at
+
+    def is_expired(self, now):
+        return self.expires_at is not None and self.expires_at <= now
+
+    def to_dict(self):
+        return {"kind": self.kind, "name": self.name, "chat_id": self.chat_id,
+                "requested_by": self.requested_by, "expires_at": self.expires_at}
+
+
+class LoginWatchIndex:
+    """
+    The /notify and /unotify watches, indexed by case-folded nickname or
+    username so each login is checked with two dict lookups.
+
+    A name can have any number of watchers; each Telegram chat watches a
+    name at most once, and asking again replaces the earlier watch. Watches
+    fire once and can expire. They are kept in a JSON file so they survive
+    restarts: changes made by commands are written straight away, and
+    watches used up by logins are written by `save()` (run as housekeeping),
+    which only touches the disk if something changed.
+    """
+    NICKNAME = "nickname"
+    USERNAME = "username"
+
+    def __init__(self, path="login_watches.json"):
+        self.path = path
+        self._lock = Lock()
+        self._watches = {}
+        self._dirty = False
+        self.load()
+
+    @staticmethod
+    def _key(kind, name):
+        return kind, name.strip().casefold()
+
+    def add(self, kind, name, chat_id, requested_by=None, expires_at=None):
+        watch = LoginWatch(kind, name.strip(), str(chat_id), requested_by, expires_at)
+        with self._lock:
+            self._watches.setdefault(self._key(kind, watch.name), {})[watch.chat_id] = watch
+            self._dirty = True
+        self.save()
+        return watch
+
+    def remove(self, kind, name, chat_id=None):
+        """Removes the watches on a name (only the given chat's, if `chat_id` is set). Returns how many were removed."""
+        key = self._key(kind, name)
+        with self._lock:
+            watchers = self._watches.get(key)
+            if not watchers:
+                return 0
+            if chat_id is None:
+                removed = len(watchers)
+                del self._watches[key]
+            else:
+                removed = 1 if watchers.pop(str(chat_id), None) else 0
+                if not watchers:
+                    del self._watches[key]
+            self._dirty = self._dirty or removed > 0
+        if removed:
+            self.save()
+        return removed
+
+    def pop_matches(self, nickname, username):
+        """Removes and returns the unexpired watches on a user who just logged in."""
+        now = time.time()
+        matches = []
+        with self._lock:
+            for key in (self._key(self.NICKNAME, nickname), self._key(self.USERNAME, username)):
+                watchers = self._watches.pop(key, None)
+                if not watchers:
+                    continue
+                self._dirty = True
+                matches.extend(watch for watch in watchers.values() if not watch.is_expired(now))
+        return matches
+
+    def expire(self):
+        """Drops the watches that have expired."""
+        now = time.time()
+        with self._lock:
+            for key in list(self._watches):
+                watchers = self._watches[key]
+                for chat_id in [chat_id for chat_id, watch in watchers.items() if watch.is_expired(now)]:
+                    del watchers[chat_id]
+                    self._dirty = True
+                if not watchers:
+                    del self._watches[key]
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not read login watches {self.path}: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for entry in data:
+                try:
+                    watch = LoginWatch(entry["kind"], entry["name"], entry["chat_id"], entry.get("requested_by"), entry.get("expires_at"))
+                except (KeyError, TypeError):
+                    continue
+                if not watch.is_expired(now):
+                    self._watches.setdefault(self._key(watch.kind, watch.name), {})[watch.chat_id] = watch
+
+    def save(self):
+        """Writes the watches to disk if they changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = [watch.to_dict() for watchers in self._watches.values() for watch in watchers.values()]
+            self._dirty = False
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.error(f"Could not save login watches {self.path}: {e}")
+
+    def __len__(self):
+        return sum(len(watchers) for watchers in self._watches.values())
@@ -0,0 +1,87 @@
+import ipaddress
+
+
+def normalize_name(name):
+    return name.strip().casefold()
+
+
+class NameSet:
+    """An immutable, case-insensitive set of usernames or nicknames built from a config list."""
+    def __init__(self, names=()):
+        self._names = frozenset(normalize_name(name) for name in names if name.strip())
+
+    def __contains__(self, name):
+        return normalize_name(name) in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+
+class IPSet:
+    """
+    An immutable set of IP addresses and networks ("10.0.0.0/8",
+    "2001:db8::/32") built from a config list.
+
+    Single addresses are kept in a hash set. Networks go into a binary
+    prefix trie per IP version, so a lookup walks at most 32 (IPv4) or 128
+    (IPv6) nodes however many networks are listed. IPv4-mapped IPv6
+    addresses are matched as IPv4. Entries that are not valid addresses or
+    networks are skipped and listed in `invalid`.
+    """
+    BITS = {4: 32, 6: 128}
+
+    def __init__(self, entries=()):
+        self._addresses = set()
+        self._tries = {4: {}, 6: {}}
+        self._networks = 0
+        self.invalid = []
+        for entry in entries:
+            entry = entry.strip()
+            if not entry:
+                continue
+            try:
+                network = ipaddress.ip_network(entry, strict=False)
+            except ValueError:
+                self.invalid.append(entry)
+                continue
+            if network.num_addresses == 1:
+                address = network.network_address
+                self._addresses.add(address.ipv4_mapped or address if address.version == 6 else address)
+            else:
+                self._insert(network)
+
+    def _insert(self, network):
+        node = self._tries[network.version]
+        value = int(network.network_address)
+        top = self.BITS[network.version] - 1
+        for shift in range(top, top - network.prefixlen, -1):
+            if node.get("end"):
+                return # A wider network already covers this one
+            node = node.setdefault((value >> shift) & 1, {})
+        node.clear()
+        node["end"] = True
+        self._networks += 1
+
+    def __contains__(self, ip_address):
+        try:
+            address = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return False
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        if address in self._addresses:
+            return True
+        if not self._networks:
+            return False
+        node = self._tries[address.version]
+        value = int(address)
+        for shift in range(self.BITS[address.version] - 1, -1, -1):
+            if node.get("end"):
+                return True
+            node = node.get((value >> shift) & 1)
+            if node is None:
+                return False
+        return node.get("end", False)
+
+    def __len__(self):
+        return len(self._addresses) + self._networks
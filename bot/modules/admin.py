@@ -1,8 +1,11 @@
 from TeamTalk5 import BanType, BannedUser, UserAccount, UserType, TextMsgType, TextMessage, ttstr
-from bot.utils import BotUtils as utils, ShutdownSignal, RestartSignal
+from bot.utils import ShutdownSignal, RestartSignal
+from bot.sanctions import Sanction, SanctionStore
+from bot.sanction_journal import SanctionJournal
+from bot.outbox import Outbox
 import TeamTalk5 as teamtalk
-import time
-from threading import Thread
+from threading import Lock
+import logging
 import paramiko
 import re
 import os
@@ -14,10 +17,13 @@ class AdminCog:
     def __init__(self, bot):
         self.bot = bot
         self._ = bot._        
-        self.duration_kicks = {}
-        self.pending_kicks = {}
-        self.banned_users = {}
-        self.duration_bans = {}
+        self.sanction_journal = SanctionJournal("sanctions.db")
+        self.sanctions = SanctionStore(journal=self.sanction_journal)
+        self.sanctions.restore(self.sanction_journal.load())
+        if len(self.sanctions):
+            print(self._("Restored {count} kicks and bans from the sanction journal.").format(count=len(self.sanctions)))
+        self._expiry_task = None
+        self._expiry_lock = Lock()
 
     def register(self, command_handler):
         """Registers all the admin commands."""
@@ -36,10 +42,11 @@ class AdminCog:
         command_handler.register_command('new', self.handle_new_account_command, admin_only=True, help_text=self._("Creates a new user account. Usage: /new <user> <pass> [rights]. the rights is a list of user rights separated by spaces for each number."))
         command_handler.register_command('cm', self.handle_channel_messages_command, admin_only=True, help_text=self._("Toggle playback channel messages on or off. Usage: /cm"))
         command_handler.register_command('l', self.handle_lock_command, admin_only=True, help_text=self._("Locks or unlocks bot commands (admins only). Usage: /l"))
-        command_handler.register_command('shutdown', self.handle_shutdown_command, admin_only=True, help_text=self._("Shuts down the bot."))
-        command_handler.register_command('sd', self.handle_shutdown_command, admin_only=True, help_text=self._("Alias for /shutdown."))
-        command_handler.register_command('restart', self.handle_restart_command, admin_only=True, help_text=self._("Restarts the bot."))
-        command_handler.register_command('rs', self.handle_restart_command, admin_only=True, help_text=self._("Alias for /restart."))
+        command_handler.register_command('shutdown', self.handle_shutdown_command, admin_only=True, help_text=self._("Shuts down the bot."), aliases=('sd',))
+        command_handler.register_command('restart', self.handle_restart_command, admin_only=True, help_text=self._("Restarts the bot."), aliases=('rs',))
+        command_handler.register_command('timers', self.handle_timers_command, admin_only=True, help_text=self._("Lists the bot's pending timed actions, such as unbans and file deletions."))
+        command_handler.register_command('timings', self.handle_timings_command, admin_only=True, help_text=self._("Shows how often each command ran and how long it took."))
+        command_handler.register_command('queues', self.handle_queues_command, admin_only=True, help_text=self._("Shows the event processing queues and how busy they are."))
 
     def handle_shutdown_command(self, textmessage, *args):
         """Handles the command to shut down the bot."""
@@ -53,6 +60,34 @@ class AdminCog:
         print("\nRestart requested by admin command.")
         raise RestartSignal
 
+    def handle_queues_command(self, textmessage, *args):
+        """Reports the queue depth and throughput of each event lane."""
+        for lane_name, metrics in self.bot.event_pipeline.get_metrics().items():
+            self.bot.privateMessage(textmessage.nFromUserID, self._("{lane}: {depth} queued (peak {peak_depth}), {processed} processed, {failed} failed, {workers} workers.").format(lane=lane_name, **metrics))
+        self.bot.privateMessage(textmessage.nFromUserID, self._("Subscription commands issued this session: {count}").format(count=self.bot.subscription_commands_issued))
+        self.bot.privateMessage(textmessage.nFromUserID, self._("VPN screening: {screened} logins screened, {flagged} removed.").format(screened=self.bot.vpn_screener.screened, flagged=self.bot.vpn_screener.flagged))
+        outbox = self.bot.outbox.get_metrics()
+        self.bot.privateMessage(textmessage.nFromUserID, self._("Outbox: {depths}; {queued} messages queued, {sent} packets sent.").format(depths=", ".join(f"{lane} {depth}" for lane, depth in outbox["depths"].items()), queued=outbox["queued"], sent=outbox["sent"]))
+
+    def handle_timings_command(self, textmessage, *args):
+        """Lists command handlers by total time spent in them, most expensive first."""
+        timings = sorted(self.bot.command_handler.timings.items(), key=lambda item: item[1].total_seconds, reverse=True)
+        if not timings:
+            self.bot.privateMessage(textmessage.nFromUserID, self._("No commands have run yet."))
+            return
+        for name, timing in timings:
+            self.bot.privateMessage(textmessage.nFromUserID, self._("{name}: {calls} calls, {average:.1f} ms average, {max:.1f} ms max").format(
+                name=name, calls=timing.calls, average=timing.total_seconds / timing.calls * 1000, max=timing.max_seconds * 1000), Outbox.BULK)
+
+    def handle_timers_command(self, textmessage, *args):
+        """Lists every pending action on the shared scheduler."""
+        tasks = self.bot.scheduler.list_tasks()
+        if not tasks:
+            self.bot.privateMessage(textmessage.nFromUserID, self._("There are no pending timed actions."))
+            return
+        for task in tasks:
+            self.bot.privateMessage(textmessage.nFromUserID, self._("{name}: in {seconds} seconds").format(name=task.name, seconds=int(task.remaining())))
+
     def handle_lock_command(self, textmessage, *args):
         """Toggles command lock so only admins can run commands."""
         self.bot.commands_locked = not self.bot.commands_locked
@@ -69,95 +104,75 @@ class AdminCog:
         user_id = user.nUserID
 
         # 1. Check for auto-jailing
-        if username in self.bot.bot_config["jail_users"] or nickname in self.bot.bot_config["jail_names"]:
+        if self.bot.is_jailed(user):
             jail_channel_id = self.bot.getChannelIDFromPath(ttstr(self.bot.bot_config["jail_channel"]))
             if jail_channel_id:
                 self.bot.doMoveUser(user_id, jail_channel_id)
 
-        # 2. Check for pending duration kicks (by nickname and username)
-        if nickname.lower() in self.pending_kicks:
-            _, duration, end_time = self.pending_kicks[nickname.lower()]
-            if time.time() < end_time:
-                self.bot.kick_user(user_id)
-                user_data = (nickname, ip_address, username)
-                self.duration_kicks[user_data] = (duration, end_time)
-            del self.pending_kicks[nickname.lower()]
+        # 2. Check for pending kicks, duration kicks and duration bans in one indexed lookup
+        for sanction in self.sanctions.find(nickname=nickname, username=username, ip_address=ip_address):
+            if sanction.kind == Sanction.PENDING_KICK:
+                # A pending kick only names the user; once they show up it becomes a full duration kick.
+                self.sanctions.remove(sanction)
+                self.sanctions.add(Sanction.KICK, nickname=nickname, username=username, ip_address=ip_address,
+                                   duration=sanction.duration, expires_at=sanction.expires_at)
+                self._arm_expiry()
+            self.bot.kick_user(user_id)
             return True # User was kicked, stop processing
 
-        if username.lower() in self.pending_kicks:
-            _, duration, end_time = self.pending_kicks[username.lower()]
-            if time.time() < end_time:
-                self.bot.kick_user(user_id)
-                user_data = (nickname, ip_address, username)
-                self.duration_kicks[user_data] = (duration, end_time)
-            del self.pending_kicks[username.lower()]
-            return True # User was kicked, stop processing
-
-        # 3. Check for active duration kicks
-        for user_data, (duration, end_time) in list(self.duration_kicks.items()):
-            if time.time() < end_time:
-                if user_data[0] == nickname or user_data[1] == ip_address or (user_data[2] and user_data[2] == username):
-                    self.bot.kick_user(user_id)
-                    return True # User was kicked, stop processing
-            else:
-                del self.duration_kicks[user_data] # Clean up expired kick
-
-        # 4. Check for active duration bans
-        if ip_address in self.duration_bans:
-            _, end_time = self.duration_bans[ip_address]
-            if time.time() < end_time:
-                self.bot.kick_user(user_id)
+        # 3. Check for banned countries, without waiting on the network
+        if self.bot.bot_config["banned_countries"]:
+            country, _ = self.bot.geolocator.get_location(ip_address, allow_remote=False)
+            if self.check_banned_country(user, country):
                 return True
-            else:
-                del self.duration_bans[ip_address]
-    
-        if username in self.duration_bans:
-            _, end_time = self.duration_bans[username]
-            if time.time() < end_time:
-                self.bot.kick_user(user_id)
-                return True
-            else:
-                del self.duration_bans[username]
-            
-        # 5. Check against blacklist.txt (using the utility loader)
-        blacklist = utils.load_blacklist("blacklist.txt")
-        if any(word in blacklist for word in nickname.lower().split()):
+
+        # 4. Check against blacklist.txt (using the shared compiled matcher)
+        if self.bot.blacklist.search(nickname):
             if self.bot.bot_config["blacklist_mode"] == 1:
                 self.bot.kick_user(user_id)
             elif self.bot.bot_config["blacklist_mode"] == 2:
-                self.bot.ban_user(user_id, BanType.BANTYPE_IPADDR)
+                self.ban_user(user_id, BanType.BANTYPE_IPADDR, user=user)
                 self.bot.kick_user(user_id)
             return True
 
-        # 6. Check for "NoName"
+        # 5. Check for "NoName"
         if self.bot.bot_config['prevent_noname']:
             if not nickname or re.match(r"^NoName\s*(?:-\s*#\d+)?$", nickname):
-                self.bot.privateMessage(user_id, self.bot.bot_config['noname_note'])
+                self.bot.privateMessage(user_id, self.bot.bot_config['noname_note'], Outbox.MODERATION)
                 self.bot.kick_user(user_id)
                 return True
 
-        # 7. Check for character limit
+        # 6. Check for character limit
         char_limit = self.bot.bot_config["char_limit"]
         if char_limit > 0 and len(nickname) > char_limit:
             if self.bot.bot_config["char_limit_mode"] == 1:
-                self.bot.privateMessage(user_id, self._("You have been kicked due to username exceeding {chars} characters.").format(chars=char_limit))
+                self.bot.privateMessage(user_id, self._("You have been kicked due to username exceeding {chars} characters.").format(chars=char_limit), Outbox.MODERATION)
                 self.bot.kick_user(user_id)
             elif self.bot.bot_config["char_limit_mode"] == 2:
-                self.bot.ban_user(user_id, BanType.BANTYPE_IPADDR)
+                self.ban_user(user_id, BanType.BANTYPE_IPADDR, user=user)
                 self.bot.kick_user(user_id)
             return True
         return False
 
+    def check_banned_country(self, user, country):
+        """Kicks the user if their country is in banned_countries. Returns True if they were kicked."""
+        if not country:
+            return False
+        country_folded = country.casefold()
+        if not any(banned.casefold() == country_folded for banned in self.bot.bot_config["banned_countries"]):
+            return False
+        print(self._("User {nickname} is connecting from banned country {country}, kicking.").format(nickname=ttstr(user.szNickname), country=country))
+        self.bot.privateMessage(user.nUserID, self._("Connections from {country} are not allowed on this server.").format(country=country), Outbox.MODERATION)
+        self.bot.kick_user(user.nUserID)
+        return True
+
     def check_message_for_blacklist(self, textmessage: TextMessage):
         """Checks a text message for blacklisted words and takes action."""
         if textmessage.nFromUserID == self.bot.getMyUserID():
             return False
 
         message_text = ttstr(textmessage.szMessage)
-        blacklist = utils.load_blacklist("blacklist.txt")
-        pattern = r"\b(" + "|".join(re.escape(word) for word in blacklist) + r")\b"
-
-        if blacklist and re.search(pattern, message_text, re.IGNORECASE):
+        if self.bot.blacklist.search(message_text):
             streamer = teamtalk.VideoCodec()
             streamer.nCodec = 1
             self.bot.startStreamingMediaFileToChannel(ttstr(os.path.join("files", "blacklist.wav")), streamer)
@@ -165,7 +180,7 @@ class AdminCog:
             if self.bot.bot_config['blacklist_mode'] == 1:
                 self.bot.kick_user(textmessage.nFromUserID)
             elif self.bot.bot_config['blacklist_mode'] == 2:
-                self.bot.ban_user(textmessage.nFromUserID)
+                self.ban_user(textmessage.nFromUserID)
                 self.bot.kick_user(textmessage.nFromUserID)
             return True
         return False
@@ -227,9 +242,8 @@ class AdminCog:
             duration_seconds = self.parse_duration_string(duration_str)
             user = self.bot.getUserByName(nickname)
             if user:
-                self.bot.ban_user(user.nUserID, ban_type)
+                self.ban_user(user.nUserID, ban_type, duration_seconds, user=user)
                 self.bot.send_message(self._("{nickname} has been banned for {duration}.").format(nickname=ttstr(user.szNickname), duration=duration_str))
-                Thread(target=self.remove_ban_after_duration, args=(user, duration_seconds, ban_type)).start()
                 self.bot.kick_user(user.nUserID)
             else:
                 self.bot.privateMessage(textmessage.nFromUserID, self._("User '{nickname}' not found.").format(nickname=nickname))
@@ -248,10 +262,12 @@ class AdminCog:
             if user:
                 self.bot.kick_user(user.nUserID)
                 self.bot.send_message(self._("{nickname} has been kicked for {duration}.").format(nickname=ttstr(user.szNickname), duration=duration_str))
-                user_data = (ttstr(user.szNickname), ttstr(user.szIPAddress), ttstr(user.szUsername))
-                self.duration_kicks[user_data] = (duration_seconds, time.time() + duration_seconds)
+                self.sanctions.add(Sanction.KICK, nickname=ttstr(user.szNickname), username=ttstr(user.szUsername),
+                                   ip_address=ttstr(user.szIPAddress), duration=duration_seconds)
+                self._arm_expiry()
             else:
-                self.pending_kicks[nickname.lower()] = ("nickname", duration_seconds, time.time() + duration_seconds)
+                self.sanctions.add(Sanction.PENDING_KICK, nickname=nickname, duration=duration_seconds)
+                self._arm_expiry()
                 self.bot.send_message(self._("User '{nickname}' not found. They will be kicked when they log in for {duration}.").format(nickname=nickname, duration=duration_str))
         except (ValueError, IndexError):
             self.bot.privateMessage(textmessage.nFromUserID, self._("Invalid format. Usage: /dk <nickname> <duration>"))
@@ -268,10 +284,12 @@ class AdminCog:
             if user and user.nUserID != 0:
                 self.bot.kick_user(user.nUserID)
                 self.bot.send_message(self._("User with username '{username}' has been kicked for {duration}.").format(username=username, duration=duration_str))
-                user_data = (ttstr(user.szNickname), ttstr(user.szIPAddress), ttstr(user.szUsername))
-                self.duration_kicks[user_data] = (duration_seconds, time.time() + duration_seconds)
+                self.sanctions.add(Sanction.KICK, nickname=ttstr(user.szNickname), username=ttstr(user.szUsername),
+                                   ip_address=ttstr(user.szIPAddress), duration=duration_seconds)
+                self._arm_expiry()
             else:
-                self.pending_kicks[username.lower()] = ("username", duration_seconds, time.time() + duration_seconds)
+                self.sanctions.add(Sanction.PENDING_KICK, username=username, duration=duration_seconds)
+                self._arm_expiry()
                 self.bot.send_message(self._("User with username '{username}' not found. They will be kicked when they log in for {duration}.").format(username=username, duration=duration_str))
         except (ValueError, IndexError):
             self.bot.privateMessage(textmessage.nFromUserID, self._("Invalid format. Usage: /udk <username> <duration>"))
@@ -293,18 +311,6 @@ class AdminCog:
                 raise ValueError(f"Invalid duration part: {part}")
         return duration_seconds
 
-    def remove_ban_after_duration(self, user, duration_seconds, ban_type):
-        time.sleep(duration_seconds)
-        if ban_type == BanType.BANTYPE_IPADDR:
-            self.bot.doUnBanUser(user.szIPAddress, 0)
-            self.bot.send_message(self._("{nickname} (IP ban) has been unbanned.").format(nickname=ttstr(user.szNickname)))
-        else:
-            banned_user = BannedUser()
-            banned_user.szUsername = user.szUsername
-            banned_user.uBanTypes = BanType.BANTYPE_USERNAME
-            self.bot.doUnbanUserEx(banned_user)
-            self.bot.send_message(self._("{nickname} (Username ban) has been unbanned.").format(nickname=ttstr(user.szNickname)))
-
 
     def handle_change_name_command(self, textmessage, *args):
         if not args:
@@ -338,7 +344,7 @@ class AdminCog:
             self.bot.privateMessage(textmessage.nFromUserID, self._("Available modes are: m for male, f for female, n for neutral."))
             
     def save_bot_config(self, textmessage, *args):
-        self.bot.config_handler.save_bot_config(self.bot.bot_config)
+        self.bot.save_bot_config()
         self.bot.config_handler.save_playback_config(self.bot.playback_config)
         self.bot.privateMessage(textmessage.nFromUserID, self._("Bot configuration saved."))
 
@@ -377,51 +383,75 @@ class AdminCog:
 
     def clear_for_target(self, target):
         found = False
-        target_lower = target.lower()
-        if target in self.banned_users:
-            self.unban_user(self.banned_users[target])
-            self.bot.send_message(self._("Cleared ban for {target}.").format(target=target))
-            found = True
-        
-        for user_data, (duration, end_time) in list(self.duration_kicks.items()):
-            nickname, ip_address, username = user_data
-            if target in (nickname, ip_address, username):
-                del self.duration_kicks[user_data]
-                self.bot.send_message(self._("Cleared duration kick for {target}.").format(target=target))
-                found = True
-        
-        if target_lower in self.pending_kicks:
-            del self.pending_kicks[target_lower]
-            self.bot.send_message(self._("Cleared pending kick for {target}.").format(target=target))
+        cleared_messages = {
+            Sanction.BAN: self._("Cleared ban for {target}."),
+            Sanction.KICK: self._("Cleared duration kick for {target}."),
+            Sanction.PENDING_KICK: self._("Cleared pending kick for {target}."),
+        }
+        for sanction in self.sanctions.find_target(target):
+            if sanction.kind == Sanction.BAN:
+                self.unban_user(sanction)
+            else:
+                self.sanctions.remove(sanction)
+            self.bot.send_message(cleared_messages[sanction.kind].format(target=target))
             found = True
             
         if not found:
             self.bot.send_message(self._("Target '{target}' not found in active bans or kicks.").format(target=target))
 
     def clear_all(self):
-        if not self.banned_users and not self.duration_kicks and not self.pending_kicks:
+        if not len(self.sanctions):
             self.bot.send_message(self._("There are no active bans or kicks to clear."))
             return
         
-        for ban_key in list(self.banned_users.keys()):
-            self.unban_user(self.banned_users[ban_key])
+        for sanction in self.sanctions.all([Sanction.BAN]):
+            self.unban_user(sanction)
         
-        self.duration_kicks.clear()
-        self.pending_kicks.clear()
+        self.sanctions.clear()
         self.bot.send_message(self._("Cleared all bans and duration kicks."))
 
-    def unban_user(self, banned_user_obj):
+    def _arm_expiry(self):
+        """Makes sure a scheduler task is due at the sanction store's next expiry."""
+        next_expiry = self.sanctions.next_expiry()
+        with self._expiry_lock:
+            task = self._expiry_task
+            if task is not None and not task.done and not task.cancelled:
+                if next_expiry is not None and task.run_at <= next_expiry:
+                    return
+                task.cancel()
+            self._expiry_task = None
+            if next_expiry is not None:
+                self._expiry_task = self.bot.scheduler.schedule_at(next_expiry, self.expire_sanctions, name=self._("Sanction expiry"))
+
+    def expire_sanctions(self):
+        """Processes every kick and ban whose time is up, lifting timed bans on the server."""
+        if not self.bot.connected or not self.bot.getFlags() & teamtalk.ClientFlags.CLIENT_AUTHORIZED:
+            # Bans can only be lifted while logged in; this runs again from onCmdMyselfLoggedIn.
+            return
+        for sanction in self.sanctions.expire():
+            if sanction.kind == Sanction.BAN:
+                self.unban_user(sanction)
+                if sanction.ban_type == BanType.BANTYPE_IPADDR:
+                    self.bot.send_message(self._("{nickname} (IP ban) has been unbanned.").format(nickname=sanction.label))
+                else:
+                    self.bot.send_message(self._("{nickname} (Username ban) has been unbanned.").format(nickname=sanction.label))
+            else:
+                print(f"Admin: {sanction.kind} for {sanction.label} has expired.")
+        self._arm_expiry()
+
+    def unban_user(self, sanction):
+        """Lifts a ban on the server and removes it from the sanction store."""
         try:
-            if banned_user_obj.uBanTypes == BanType.BANTYPE_IPADDR:
-                self.bot.doUnBanUser(banned_user_obj.szIPAddress, 0)
-                if banned_user_obj.szIPAddress in self.banned_users:
-                    del self.banned_users[banned_user_obj.szIPAddress]
-            elif banned_user_obj.uBanTypes == BanType.BANTYPE_USERNAME:
-                self.bot.doUnbanUserEx(banned_user_obj)
-                if banned_user_obj.szUsername in self.banned_users:
-                    del self.banned_users[banned_user_obj.szUsername]
+            banned_user = BannedUser()
+            banned_user.uBanTypes = sanction.ban_type
+            if sanction.ban_type == BanType.BANTYPE_IPADDR:
+                self.bot.doUnBanUser(ttstr(sanction.ip_address), 0)
+            elif sanction.ban_type == BanType.BANTYPE_USERNAME:
+                banned_user.szUsername = ttstr(sanction.username)
+                self.bot.doUnbanUserEx(banned_user)
         except Exception as e:
             print(f"Error during unban: {e}")
+        self.sanctions.remove(sanction)
 
     def handle_admin_broadcast(self, textmessage, *args):
         if not args:
@@ -430,45 +460,63 @@ class AdminCog:
         message = " ".join(args)
         self.bot.send_broadcast_message(self._("Message from administrators: {message}").format(message=message))
 
-    def ban_user(self, user_id, ban_type=BanType.BANTYPE_USERNAME):
-        """Bans a user by either IP or Username, updating internal state."""
-        while True:
-            user = self.bot.getUser(user_id)
-            if user is not None:
-                break
-            else:
-                continue
+    def ban_user(self, user_id, ban_type=BanType.BANTYPE_USERNAME, duration_seconds=None, user=None):
+        """
+        Bans a user by either IP or Username, recording the ban in the sanction store.
+
+        The identifiers come from `user` (a snapshot taken when the event arrived) or the
+        user index, so the ban still works if the user has already left. If no identifier
+        is known, the server is asked to ban the user id itself. Returns a future that
+        resolves when the server confirms or rejects the ban.
+        """
+        if user is None:
+            user = self.bot.user_index.get(user_id)
+        nickname = ttstr(user.szNickname) if user else str(user_id)
+        ip_address = ttstr(user.szIPAddress) if user else ""
+        username = ttstr(user.szUsername) if user else ""
 
-        banned_user = BannedUser()        
         effective_ban_type = ban_type
         identifier = None
-
         if ban_type == BanType.BANTYPE_IPADDR:
-            while True:
-                identifier = ttstr(user.szIPAddress)
-                if identifier is None or identifier == "": continue
-                else: break
+            identifier = ip_address
+        elif username == 'guest' or username == self.bot.accounts_config.get('custom_username', ''):
+            # Fallback to IP ban for guest-like accounts
+            effective_ban_type = BanType.BANTYPE_IPADDR
+            identifier = ip_address
         else:
-            username = ttstr(user.szUsername)
-            if username == 'guest' or username == self.bot.accounts_config.get('custom_username', ''):
-                # Fallback to IP ban for guest-like accounts
-                effective_ban_type = BanType.BANTYPE_IPADDR
-                while True:
-                    identifier = ttstr(user.szIPAddress)
-                    if identifier is None or identifier == "": continue
-                    else: break
-            else:
-                identifier = username
+            identifier = username
 
-        if not identifier:
-            print(f"Admin: Could not get a valid identifier to ban user {user.szNickname}")
-            return
-            
-        if effective_ban_type == BanType.BANTYPE_IPADDR:
-            banned_user.szIPAddress = ttstr(identifier)
+        sanction = None
+        if identifier:
+            banned_user = BannedUser()
+            if effective_ban_type == BanType.BANTYPE_IPADDR:
+                banned_user.szIPAddress = ttstr(identifier)
+                sanction = self.sanctions.add(Sanction.BAN, ip_address=identifier, duration=duration_seconds,
+                                              ban_type=effective_ban_type, label=nickname)
+            else:
+                banned_user.szUsername = ttstr(identifier)
+                sanction = self.sanctions.add(Sanction.BAN, username=identifier, duration=duration_seconds,
+                                              ban_type=effective_ban_type, label=nickname)
+            banned_user.uBanTypes = effective_ban_type
+            if duration_seconds is not None:
+                self._arm_expiry()
+            cmd_id = self.bot.doBan(banned_user)
         else:
-            banned_user.szUsername = ttstr(identifier)
-        
-        banned_user.uBanTypes = effective_ban_type        
-        self.banned_users[identifier] = banned_user
-        self.bot.doBan(banned_user)
+            # Nothing to ban by locally; let the server resolve the user id. Such a ban can't be lifted on a timer.
+            if duration_seconds is not None:
+                print(f"Admin: No identifier known for {nickname}, the ban on user id {user_id} will not expire automatically.")
+            cmd_id = self.bot.doBanUserEx(user_id, effective_ban_type)
+
+        future = self.bot.command_tracker.track(cmd_id, f"ban of {nickname}")
+        future.add_done_callback(lambda f: self._on_ban_result(f, nickname, sanction))
+        return future
+
+    def _on_ban_result(self, future, nickname, sanction):
+        error = future.exception()
+        if error is None:
+            print(f"Admin: {nickname} has been banned.")
+            return
+        print(f"Admin: Failed to ban {nickname}: {error}")
+        logging.error(f"Ban of {nickname} failed: {error}")
+        if sanction is not None:
+            self.sanctions.remove(sanction)
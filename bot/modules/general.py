@@ -1,4 +1,5 @@
-from TeamTalk5 import ttstr, UserType
+from TeamTalk5 import ttstr
+from bot.outbox import Outbox
 import wikipedia
 import langdetect
 import requests
@@ -15,8 +16,7 @@ class GeneralCog:
         """Registers all the general commands."""
         command_handler.register_command('weather', self.handle_weather_command, help_text=self._("Gets the current weather info for your location or a specified user. Usage: /weather <nickname (Optional)>"))
         command_handler.register_command('search', self.handle_search_command, help_text=self._("Searches Wikipedia for a summary. Usage: /search <query>"))
-        command_handler.register_command('h', self.handle_help_command, help_text=self._("Shows this help message."))
-        command_handler.register_command('help', self.handle_help_command, help_text=self._("Shows this help message."))
+        command_handler.register_command('help', self.handle_help_command, help_text=self._("Shows this help message."), aliases=('h',))
         command_handler.register_command('myinfo', self.handle_myinfo_command, help_text=self._("Shows your user account information."))
 
     def handle_weather_command(self, textmessage, *args):
@@ -108,16 +108,9 @@ class GeneralCog:
     def handle_help_command(self, textmessage, *args):
         """Dynamically generates and sends the help message."""
         user_id = textmessage.nFromUserID
-        sender_user = self.bot.getUser(user_id)
-        is_admin = False
-        
-        if sender_user:
-            sender_username = ttstr(sender_user.szUsername).lower()
-            authorized_users = [u.strip().lower() for u in self.bot.accounts_config.get("authorized_users", [])]
-            if sender_username in authorized_users or (self.bot.accounts_config.get('detect_server_admins') and sender_user.uUserType == UserType.USERTYPE_ADMIN):
-                is_admin = True
-        
-        self.bot.privateMessage(user_id, self._("--- Available Commands ---"))
+        is_admin = self.bot.permissions.is_authorized(user_id, ttstr(textmessage.szFromUsername))
+
+        self.bot.privateMessage(user_id, self._("--- Available Commands ---"), Outbox.BULK)
         # Sort commands alphabetically for readability
         commands = self.bot.command_handler.commands.items()
         for name, command in commands:
@@ -127,15 +120,41 @@ class GeneralCog:
             
             prefix = self.bot.command_handler.prefix
             help_text = command.help_text or self._("No description available.")
-            message = f"{prefix}{name}: {help_text}"
-            self.bot.privateMessage(user_id, message)
+            names = ", ".join(f"{prefix}{command_name}" for command_name in (name,) + command.aliases)
+            message = f"{names}: {help_text}"
+            self.bot.privateMessage(user_id, message, Outbox.BULK)
         
-        self.bot.privateMessage(user_id, self._("--- Special Commands ---"))
-        self.bot.privateMessage(user_id, self._("'<text>: Make the bot speaks some text, Same as /say command, but for quick usability."))
-        self.bot.privateMessage(user_id, self._("+ <seconds (Optional)>, Plus sign: Seek forward in the current media file. Without arguments, seek forward using the default value. With arguments, seek forward by how many seconds are specified. For example, + 10 will seek forward by 10 seconds."))
-        self.bot.privateMessage(user_id, self._("- <seconds (Optional)>, Dash sign: Seek backward in the current media file. With arguments, seek backward using the default value. With arguments, seek backward by how many seconds are specified. For example, -10 will seek backward by 10 seconds."))
+        self.bot.privateMessage(user_id, self._("--- Special Commands ---"), Outbox.BULK)
+        self.bot.privateMessage(user_id, self._("'<text>: Make the bot speaks some text, Same as /say command, but for quick usability."), Outbox.BULK)
+        self.bot.privateMessage(user_id, self._("+ <seconds (Optional)>, Plus sign: Seek forward in the current media file. Without arguments, seek forward using the default value. With arguments, seek forward by how many seconds are specified. For example, + 10 will seek forward by 10 seconds."), Outbox.BULK)
+        self.bot.privateMessage(user_id, self._("- <seconds (Optional)>, Dash sign: Seek backward in the current media file. With arguments, seek backward using the default value. With arguments, seek backward by how many seconds are specified. For example, -10 will seek backward by 10 seconds."), Outbox.BULK)
+
+    # Number of accounts requested per doListUserAccounts page while looking up /myinfo.
+    ACCOUNT_PAGE_SIZE = 100
 
     def handle_myinfo_command(self, textmessage, *args):
-        self.bot.last_command_sender_id = textmessage.nFromUserID
-        self.bot.last_command_sender_username = ttstr(textmessage.szFromUsername)
-        self.bot.doListUserAccounts(0, 100)
\ No newline at end of file
+        self._request_account_page(textmessage.nFromUserID, ttstr(textmessage.szFromUsername), 0)
+
+    def _request_account_page(self, sender_id, username, index):
+        """Lists one page of user accounts; the next page is only requested once this one has arrived."""
+        future = self.bot.command_tracker.track(self.bot.doListUserAccounts(index, self.ACCOUNT_PAGE_SIZE), "list user accounts")
+        future.add_done_callback(lambda f: self._on_account_page(f, sender_id, username, index))
+
+    def _on_account_page(self, future, sender_id, username, index):
+        if future.exception() is not None:
+            self.bot.privateMessage(sender_id, self._("Could not retrieve your account information."))
+            return
+        accounts = future.result()
+        for useraccount in accounts:
+            if ttstr(useraccount.szUsername) != username:
+                continue
+            user = self.bot.user_index.get(sender_id)
+            if not user:
+                return
+            info_message = self._("User Info:\n Nickname: {nickname}\n Username: {username}\n Password: {password}\n  IP Address: {ip_address}\n Status Message: {status_message}").format(nickname=ttstr(user.szNickname), username=username, password=ttstr(useraccount.szPassword), status_message=ttstr(user.szStatusMsg), ip_address=ttstr(user.szIPAddress))
+            self.bot.privateMessage(sender_id, info_message)
+            return
+        if len(accounts) == self.ACCOUNT_PAGE_SIZE:
+            self._request_account_page(sender_id, username, index + self.ACCOUNT_PAGE_SIZE)
+        else:
+            self.bot.privateMessage(sender_id, self._("No account information found for {username}.").format(username=username))
\ No newline at end of file
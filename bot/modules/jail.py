@@ -1,15 +1,29 @@
-import time
-from threading import Thread
 from TeamTalk5 import BanType, ttstr
+from bot.outbox import Outbox
+from bot.membership import normalize_name
+from bot.rate_detector import RateDetector
 
 class JailCog:
     """
-    A module for handling the user jailing system, including flood protection.
+    A module for handling the user jailing system, including flood protection
+    for jail escapes, channel rejoin storms and channel message spam.
     """
+    # Attempts to leave the jail channel at which a jailed user is warned.
+    JAIL_WARNING_COUNT = 3
+
     def __init__(self, bot):
         self.bot = bot
         self._ = bot._
-        self.user_join_timers = {}
+        config = self.bot.bot_config
+        self.escape_detector = RateDetector(config.get("jail_flood_count", 5), config.get("jail_timer_seconds", 10))
+        self.rejoin_detector = RateDetector(config.get("rejoin_flood_count", 10), config.get("rejoin_flood_seconds", 30))
+        self.message_detector = RateDetector(config.get("message_flood_count", 10), config.get("message_flood_seconds", 5))
+        self.bot.register_housekeeping(self.prune_detectors, 60)
+
+    @staticmethod
+    def _warning_count(detector):
+        """Users are warned once they have used up three fifths of a flood limit."""
+        return max(1, detector.limit * 3 // 5)
 
     def register(self, command_handler):
         """Registers all jail-related commands."""
@@ -22,53 +36,59 @@ class JailCog:
         username = ttstr(user.szUsername)
         nickname = ttstr(user.szNickname)
 
-        if username in self.bot.bot_config.get("jail_users", []) or nickname in self.bot.bot_config.get("jail_names", []):
+        if self.bot.is_jailed(user):
             jail_channel_id = self.bot.getChannelIDFromPath(ttstr(self.bot.bot_config["jail_channel"]))
             if user.nChannelID != jail_channel_id:
                 self.bot.doMoveUser(user.nUserID, jail_channel_id)
                 self.track_user_joins(user)
+            return
 
-    def track_user_joins(self, user):
-        """Starts tracking a jailed user's attempts to leave the jail channel."""
-        user_id = user.nUserID
-        if user_id not in self.user_join_timers:
-            self.user_join_timers[user_id] = {
-                "start_time": time.time(),
-                "join_count": 1
-            }
-            self.bot.io_pool.submit(self.monitor_user_joins, user_id)
-        else:
-            self.user_join_timers[user_id]["join_count"] += 1
+        if not self.bot.bot_config.get("flood_protection", False) or self._is_exempt(user.nUserID, username):
+            return
+        join_count = self.rejoin_detector.hit(user.nUserID)
+        if join_count >= self.rejoin_detector.limit:
+            self.rejoin_detector.forget(user.nUserID)
+            print(self._("Kicking {nickname} for switching channels too quickly.").format(nickname=nickname))
+            self.bot.kick_user(user.nUserID)
+        elif join_count >= self._warning_count(self.rejoin_detector) and self.rejoin_detector.warn_once(user.nUserID):
+            self.bot.privateMessage(user.nUserID, self._("Warning: You are switching channels too quickly. If you continue, you will be kicked."), Outbox.MODERATION)
 
-    def monitor_user_joins(self, user_id):
-        """Monitors a jailed user's join attempts and bans them if they exceed the flood count."""
-        timer_data = self.user_join_timers.get(user_id)
-        if not timer_data:
+    def handle_channel_message(self, textmessage):
+        """Counts a channel message towards its sender's spam limit, kicking the sender if it is reached."""
+        user_id = textmessage.nFromUserID
+        if not self.bot.bot_config.get("flood_protection", False) or self._is_exempt(user_id, ttstr(textmessage.szFromUsername)):
             return
+        message_count = self.message_detector.hit(user_id)
+        if message_count >= self.message_detector.limit:
+            self.message_detector.forget(user_id)
+            user = self.bot.user_index.get(user_id)
+            if user:
+                print(self._("Kicking {nickname} for channel message spam.").format(nickname=ttstr(user.szNickname)))
+                self.bot.kick_user(user_id)
+        elif message_count >= self._warning_count(self.message_detector) and self.message_detector.warn_once(user_id):
+            self.bot.privateMessage(user_id, self._("Warning: You are sending messages too quickly. If you continue, you will be kicked."), Outbox.MODERATION)
 
-        warning_sent = False
-        jail_timer_seconds = self.bot.bot_config.get("jail_timer_seconds", 10)
-        jail_flood_count = self.bot.bot_config.get("jail_flood_count", 5)
+    def _is_exempt(self, user_id, username):
+        return user_id == self.bot.getMyUserID() or self.bot.permissions.is_authorized(user_id, username)
 
-        while time.time() - timer_data["start_time"] < jail_timer_seconds:
-            current_join_count = self.user_join_timers.get(user_id, {}).get("join_count", 0)
-            if current_join_count >= 3 and not warning_sent:
-                self.bot.privateMessage(user_id, self._("Warning: You are trying to get out of jail. If you continue to spam, you will be banned."))
-                warning_sent = True
-            
-            if current_join_count >= jail_flood_count:
-                user = self.bot.getUser(user_id)
-                if user:
-                    ban_type = BanType.BANTYPE_IPADDR if ttstr(user.szUsername) == "guest" else BanType.BANTYPE_USERNAME
-                    self.bot.admin_cog.ban_user(user_id, ban_type)
-                    self.bot.kick_user(user_id)
-                    self.bot.send_broadcast_message(self._("{nickname} has been banned due to jail flood protection.").format(nickname=ttstr(user.szNickname)))
-                break
-            
-            time.sleep(1)        
-        if user_id in self.user_join_timers:
-            del self.user_join_timers[user_id]
+    def track_user_joins(self, user):
+        """Counts a jailed user's attempt to leave the jail channel, warning and then banning them if they keep trying."""
+        user_id = user.nUserID
+        join_count = self.escape_detector.hit(user_id)
+        if join_count >= self.JAIL_WARNING_COUNT and self.escape_detector.warn_once(user_id):
+            self.bot.privateMessage(user_id, self._("Warning: You are trying to get out of jail. If you continue to spam, you will be banned."), Outbox.MODERATION)
+
+        if join_count >= self.escape_detector.limit:
+            self.escape_detector.forget(user_id)
+            ban_type = BanType.BANTYPE_IPADDR if ttstr(user.szUsername) == "guest" else BanType.BANTYPE_USERNAME
+            self.bot.admin_cog.ban_user(user_id, ban_type, user=user)
+            self.bot.kick_user(user_id)
+            self.bot.send_broadcast_message(self._("{nickname} has been banned due to jail flood protection.").format(nickname=ttstr(user.szNickname)))
 
+    def prune_detectors(self):
+        """Forgets users with no recent activity; run as housekeeping."""
+        for detector in (self.escape_detector, self.rejoin_detector, self.message_detector):
+            detector.prune()
 
     def handle_jail_command(self, textmessage, *args):
         if not args:
@@ -78,11 +98,9 @@ class JailCog:
         user = self.bot.getUserByName(nickname)
         if user and user.nUserID != 0:
             username = ttstr(user.szUsername)
-            if "jail_users" not in self.bot.bot_config: self.bot.bot_config["jail_users"] = []
-            
-            if username not in self.bot.bot_config["jail_users"]:
+            if username not in self.bot.jailed_usernames:
                 self.bot.bot_config["jail_users"].append(username)
-                self.bot.config_handler.save_bot_config(self.bot.bot_config)
+                self.bot.save_bot_config()
             
             jail_channel_id = self.bot.getChannelIDFromPath(ttstr(self.bot.bot_config["jail_channel"]))
             if jail_channel_id:
@@ -99,9 +117,10 @@ class JailCog:
         user = self.bot.getUserByName(nickname)
         if user and user.nUserID != 0:
             username = ttstr(user.szUsername)
-            if username in self.bot.bot_config.get("jail_users", []):
-                self.bot.bot_config["jail_users"].remove(username)
-                self.bot.config_handler.save_bot_config(self.bot.bot_config)
+            if username in self.bot.jailed_usernames:
+                folded = normalize_name(username)
+                self.bot.bot_config["jail_users"] = [u for u in self.bot.bot_config["jail_users"] if normalize_name(u) != folded]
+                self.bot.save_bot_config()
             
             root_channel_id = self.bot.getRootChannelID()
             self.bot.doMoveUser(user.nUserID, root_channel_id)
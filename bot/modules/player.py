@@ -1,7 +1,7 @@
 from TeamTalk5 import ttstr
+import TeamTalk5 as teamtalk
 import os
 import yt_dlp
-import threading
 import time
 import random
 
@@ -9,6 +9,8 @@ class PlayerCog:
     """
     A module for handling all music and media player related commands.
     """
+    DELETE_RETRY_SECONDS = 60
+
     def __init__(self, bot):
         self.bot = bot
         self.player = bot.player
@@ -41,20 +43,8 @@ class PlayerCog:
         command_handler.register_command('r', self.handle_history_command, help_text=self._("Shows recent tracks or plays from history. Usage: /r [index]. When used without arguments, shows a history of the recent tracks."))
         command_handler.register_command('dl', self.handle_download_command, help_text=self._("Downloads the current track as an audio file. Usage: /dl <link (Optional)>. When sent without arguments, downloads the currently playing track."))
         command_handler.register_command('s', self.handle_stop_command, help_text=self._("Stops playback."))
-
-    def handle_prefixed_message(self, textmessage):
-        """
-        Handles special-prefix messages like '+' for seek that don't use the standard command prefix.
-        Returns True if the message was handled, False otherwise.
-        """
-        message_text = ttstr(textmessage.szMessage)
-        if message_text.startswith("+"):
-            self.handle_seek_forward(textmessage, message_text[1:].strip())
-            return True
-        elif message_text.startswith("-"):
-            self.handle_seek_back(textmessage, message_text[1:].strip())
-            return True
-        return False
+        command_handler.register_prefix('+', lambda textmessage, text: self.handle_seek_forward(textmessage, text.strip()))
+        command_handler.register_prefix('-', lambda textmessage, text: self.handle_seek_back(textmessage, text.strip()))
 
     def _is_in_same_channel(self, user_id):
         """Helper to check if a user is in the bot's channel."""
@@ -570,12 +560,12 @@ class PlayerCog:
             self.bot.privateMessage(user_id, self._("File {filename} downloaded. Uploading...").format(filename=filename_only))
             
             if self.bot.bot_config['video_deletion_timer'] > 0:
-                self.upload_timers[filename] = threading.Timer(
-                    self.bot.bot_config['video_deletion_timer'] * 60, 
-                    self.delete_uploaded_file, 
-                    args=(filename, channel_id)
+                self.upload_timers[filename] = self.bot.scheduler.schedule(
+                    self.bot.bot_config['video_deletion_timer'] * 60,
+                    self.delete_uploaded_file,
+                    filename, channel_id,
+                    name=self._("Delete {filename}").format(filename=filename_only)
                 )
-                self.upload_timers[filename].start()
 
         except Exception as e:
             self.bot.privateMessage(user_id, self._("Error downloading or uploading: {e}").format(e=str(e)))
@@ -584,15 +574,27 @@ class PlayerCog:
 
     def delete_uploaded_file(self, filename, channel_id):
         """Deletes the uploaded audio file after the timer expires."""
+        if not self.bot.connected or not self.bot.getFlags() & teamtalk.ClientFlags.CLIENT_AUTHORIZED:
+            # The server copy can only be removed while logged in, so try again later.
+            self.upload_timers[filename] = self.bot.scheduler.schedule(
+                self.DELETE_RETRY_SECONDS,
+                self.delete_uploaded_file,
+                filename, channel_id,
+                name=self._("Delete {filename}").format(filename=os.path.basename(filename))
+            )
+            return
         try:
-            file_id = self.get_file_id_by_name(channel_id, os.path.basename(filename)) 
+            file_id = self.get_file_id_by_name(channel_id, os.path.basename(filename))
             if file_id:
                 self.bot.doDeleteFile(channel_id, file_id)
+        except Exception as e:
+            print(self._("Error deleting file: {e}").format(e=str(e)))
+        try:
             if os.path.exists(filename):
                 os.remove(filename)
-            del self.upload_timers[filename]
-        except Exception as e:
+        except OSError as e:
             print(self._("Error deleting file: {e}").format(e=str(e)))
+        self.upload_timers.pop(filename, None)
 
     def get_file_id_by_name(self, channel_id, filename):
         """Gets the file ID from the TeamTalk server based on filename."""
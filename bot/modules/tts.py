@@ -94,6 +94,7 @@ class TTSCog:
     def register(self, command_handler):
         """Registers all the TTS commands with the command handler."""
         command_handler.register_command('say', self.handle_say_command, help_text=self._("Makes the bot speak text. Usage: /say <text> or ' <text>"))
+        command_handler.register_prefix("'", self.handle_say_prefix)
         command_handler.register_command('rate', self.handle_rate_command, help_text=self._("Sets the TTS voice rate, [-100 to 100]. Usage: /rate <value>"))
         command_handler.register_command('pitch', self.handle_pitch_command, help_text=self._("Sets the TTS voice pitch, [-100 to 100]. Usage: /pitch <value>"))
         command_handler.register_command('volume', self.handle_volume_command, help_text=self._("Sets the TTS voice volume, [0.1 to 1.0]. Usage: /volume <value>"))
@@ -108,18 +109,10 @@ class TTSCog:
         if user_id in self.user_speech_settings:
             del self.user_speech_settings[user_id]
 
-    def handle_prefixed_message(self, textmessage):
-        """
-        Handles special-prefix messages like "'" for tts.
-        Returns True if the message was handled, False otherwise.
-        """
-        message_text = ttstr(textmessage.szMessage)
-        if message_text.startswith("'"):
-            # We call the main 'say' handler but pass the text without the prefix
-            text_to_speak = message_text[1:].strip()
-            self.handle_say_command(textmessage, *text_to_speak.split())
-            return True
-        return False
+    def handle_say_prefix(self, textmessage, text):
+        """Handles "'<text>" messages, routed here by the command handler's prefix table."""
+        # We call the main 'say' handler but pass the text without the prefix
+        self.handle_say_command(textmessage, *text.split())
 
     def handle_say_command(self, textmessage, *args):
         user = self.bot.getUser(textmessage.nFromUserID)
@@ -0,0 +1,202 @@
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from TeamTalk5 import TT_STRLEN
+
+# TeamTalk limits text messages in UTF-8 bytes, or in UTF-16 code units on Windows.
+if sys.platform == "win32":
+    _WIRE_ENCODING, _WIRE_UNIT = "utf-16-le", 2
+else:
+    _WIRE_ENCODING, _WIRE_UNIT = "utf-8", 1
+
+
+def text_length(text):
+    """Returns the length of `text` in the units TeamTalk limits messages by."""
+    if text.isascii():
+        return len(text)
+    return len(text.encode(_WIRE_ENCODING)) // _WIRE_UNIT
+
+
+def split_text(text, max_length=TT_STRLEN - 1):
+    """
+    Yields pieces of `text` that each fit in one TeamTalk text message,
+    breaking at the last line break (if it is in the second half of the
+    piece) or space that fits, then at any earlier line break, or mid-word
+    if there is none.
+
+    Works in a single pass: each piece is found by measuring a window of at
+    most `max_length` characters, never the rest of the text, so splitting
+    takes linear time however long the text is.
+    """
+    start = 0
+    text_end = len(text)
+    while start < text_end:
+        window = text[start:start + max_length]
+        if text_length(window) > max_length:
+            window = window.encode(_WIRE_ENCODING)[:max_length * _WIRE_UNIT].decode(_WIRE_ENCODING, errors="ignore")
+        if start + len(window) >= text_end:
+            yield window
+            return
+        newline = window.rfind("\n")
+        cut = newline
+        if cut < len(window) // 2:
+            cut = window.rfind(" ")
+            if cut <= 0:
+                cut = newline
+        if cut <= 0:
+            yield window
+            start += len(window)
+        else:
+            yield window[:cut]
+            start += cut + 1 # Drop the separator we broke at
+
+
+class Outbox:
+    """
+    Sends the bot's text messages from a single thread at a controlled rate,
+    so bursts like /help or /users don't trip the server's flood protection
+    and don't hold up moderation messages.
+
+    - Each destination (a user, a channel, or the broadcast) has its own queue.
+    - Queues sit in priority lanes. BROADCAST is drained before NORMAL, then
+      BULK. Within a lane, destinations take turns.
+    - MODERATION messages skip the queues and go out at once from the calling
+      thread, so a warning always reaches the user before the kick or ban
+      that follows it. They still take a token, so the other lanes back off.
+    - A token bucket (`rate` packets per second, bursts of up to `burst`)
+      paces every packet sent.
+    - Consecutive queued messages to the same destination are joined with
+      newlines into one packet while they fit in a TeamTalk text message,
+      and messages too long for one are split with `split_text`.
+
+    `send(destination, text)` is called once per packet.
+    """
+    MODERATION = 0
+    BROADCAST = 1
+    NORMAL = 2
+    BULK = 3
+    PRIORITIES = (BROADCAST, NORMAL, BULK)
+    LANE_NAMES = {BROADCAST: "broadcast", NORMAL: "normal", BULK: "bulk"}
+
+    def __init__(self, send, rate=8.0, burst=10, max_length=TT_STRLEN - 1, name="TTBot_Outbox"):
+        self._send = send
+        self.rate = rate
+        self.burst = burst
+        self.max_length = max_length
+        self._lanes = {priority: OrderedDict() for priority in self.PRIORITIES}
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._running = True
+        self.messages_queued = 0
+        self.packets_sent = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, destination, text, priority=NORMAL):
+        """Queues a message; `destination` is any hashable key understood by `send`."""
+        if priority == self.MODERATION:
+            for part in split_text(text, self.max_length):
+                self._send_now(destination, part)
+            return
+        with self._condition:
+            if not self._running:
+                return
+            lane = self._lanes[priority]
+            queue = lane.get(destination)
+            if queue is None:
+                queue = lane[destination] = deque()
+            if text_length(text) > self.max_length:
+                parts = list(split_text(text, self.max_length))
+            else:
+                parts = [text]
+            queue.extend(parts)
+            self._pending += len(parts)
+            self.messages_queued += 1
+            self._condition.notify_all()
+
+    def _send_now(self, destination, text):
+        with self._condition:
+            if not self._running:
+                return
+            self._refill()
+            self._tokens -= 1
+            self.messages_queued += 1
+        try:
+            self._send(destination, text)
+            self.packets_sent += 1
+        except Exception:
+            logging.error(f"Failed to send message to {destination}:\n{traceback.format_exc()}")
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _take_packet(self):
+        """Pops the next packet: the first queued message of the next destination, plus any that fit after it."""
+        for priority in self.PRIORITIES:
+            lane = self._lanes[priority]
+            if not lane:
+                continue
+            destination, queue = lane.popitem(last=False)
+            text = queue.popleft()
+            size = text_length(text)
+            while queue:
+                next_size = text_length(queue[0]) + 1
+                if size + next_size > self.max_length:
+                    break
+                text += "\n" + queue.popleft()
+                size += next_size
+                self._pending -= 1
+            self._pending -= 1
+            if queue:
+                lane[destination] = queue # Back of the line, so other destinations get a turn
+            return destination, text
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running:
+                    self._refill()
+                    if self._pending and self._tokens >= 1:
+                        break
+                    if not self._pending:
+                        self._condition.wait()
+                    else:
+                        self._condition.wait((1 - self._tokens) / self.rate)
+                if not self._running:
+                    return
+                self._tokens -= 1
+                destination, text = self._take_packet()
+
+            try:
+                self._send(destination, text)
+                self.packets_sent += 1
+            except Exception:
+                logging.error(f"Failed to send message to {destination}:\n{traceback.format_exc()}")
+            with self._condition:
+                self._condition.notify_all()
+
+    def get_metrics(self):
+        """Returns the number of queued messages per lane and overall send counters."""
+        with self._condition:
+            depths = {self.LANE_NAMES[priority]: sum(len(queue) for queue in lane.values()) for priority, lane in self._lanes.items()}
+        return {"depths": depths, "queued": self.messages_queued, "sent": self.packets_sent}
+
+    def shutdown(self, flush_timeout=0.0):
+        """Stops the outbox, first waiting up to `flush_timeout` seconds for queued messages to go out."""
+        deadline = time.monotonic() + flush_timeout
+        with self._condition:
+            while self._pending and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            self._running = False
+            self._condition.notify_all()
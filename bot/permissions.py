@@ -0,0 +1,67 @@
+from threading import Lock
+from TeamTalk5 import UserType
+
+
+def normalize_username(username):
+    # Usernames are matched exactly, as the server treats differently cased names as separate accounts.
+    return username.strip()
+
+
+class PermissionCache:
+    """
+    Answers "may this user run admin commands?" without rebuilding the
+    authorized users list for every message.
+
+    `authorized_usernames` is a frozenset of the stripped names from the
+    [accounts] section, rebuilt only when a name is added. Each user id's
+    answer is memoized until `invalidate()` is called for it (on login,
+    update and logout) or the whole memo is cleared on reconnect. Server
+    admins count as authorized when `detect_server_admins` is enabled;
+    their user type comes from the bot's user index rather than getUser().
+    """
+    def __init__(self, accounts_config, user_index):
+        self.accounts_config = accounts_config
+        self.user_index = user_index
+        self._lock = Lock()
+        self._roles = {}
+        self.authorized_usernames = frozenset()
+        self.reload()
+
+    def reload(self):
+        """Rebuilds the authorized name set from the accounts config and forgets every memoized answer."""
+        with self._lock:
+            self.authorized_usernames = frozenset(
+                normalize_username(u) for u in self.accounts_config.get("authorized_users", []) if u.strip())
+            self._roles.clear()
+
+    def is_server_admin(self, user):
+        return self.accounts_config.get("detect_server_admins", False) and user.uUserType == UserType.USERTYPE_ADMIN
+
+    def is_authorized(self, user_id, username):
+        """Returns True if the user with this id and username is an authorized user or a detected server admin."""
+        role = self._roles.get(user_id)
+        if role is not None:
+            return role
+        role = normalize_username(username) in self.authorized_usernames
+        if not role:
+            user = self.user_index.get(user_id)
+            role = user is not None and self.is_server_admin(user)
+        with self._lock:
+            self._roles[user_id] = role
+        return role
+
+    def add_authorized_user(self, username):
+        """Authorizes a username for this session, e.g. a server admin seen logging in. Returns False if it already was."""
+        if normalize_username(username) in self.authorized_usernames:
+            return False
+        self.accounts_config["authorized_users"].append(username)
+        self.reload()
+        return True
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._roles.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._roles.clear()
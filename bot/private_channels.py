@@ -0,0 +1,108 @@
+from threading import Lock
+
+
+class PrivateChannel:
+    """A private channel created with /private for two users."""
+    __slots__ = ("user_ids", "name", "channel_id", "members")
+
+    def __init__(self, user_ids, name):
+        self.user_ids = user_ids
+        self.name = name
+        self.channel_id = None
+        self.members = set()
+
+
+class PrivateChannelRegistry:
+    """
+    Keeps track of the private channels the bot has created, indexed by the
+    ids of the two users and by channel id, so nicknames changing mid-session
+    don't matter and every event is handled with dict lookups.
+
+    A channel is reserved by name when it is requested and gets its id from
+    the CHANNEL_NEW event the server sends for it. Join and leave events
+    keep track of who is inside; once the last user has left (or logged out),
+    the caller is told to remove the now empty channel.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._by_user = {}
+        self._by_channel = {}
+        self._pending = {}
+
+    def get_by_user(self, user_id):
+        return self._by_user.get(user_id)
+
+    def reserve(self, user_ids, name):
+        """Registers a channel about to be created. Returns None if one of the users already has one."""
+        with self._lock:
+            if any(user_id in self._by_user for user_id in user_ids):
+                return None
+            entry = PrivateChannel(tuple(user_ids), name)
+            for user_id in entry.user_ids:
+                self._by_user[user_id] = entry
+            self._pending[name] = entry
+            return entry
+
+    def discard(self, entry):
+        """Forgets a channel, e.g. because creating it failed or it was removed."""
+        with self._lock:
+            self._drop(entry)
+
+    def _drop(self, entry):
+        """Must hold the lock."""
+        for user_id in entry.user_ids:
+            if self._by_user.get(user_id) is entry:
+                del self._by_user[user_id]
+        if self._pending.get(entry.name) is entry:
+            del self._pending[entry.name]
+        if entry.channel_id is not None and self._by_channel.get(entry.channel_id) is entry:
+            del self._by_channel[entry.channel_id]
+
+    def on_channel_new(self, channel_id, name):
+        """Attaches a newly created channel to its reservation. Returns the entry, or None if it isn't ours."""
+        with self._lock:
+            entry = self._pending.pop(name, None)
+            if entry is None:
+                return None
+            entry.channel_id = channel_id
+            self._by_channel[channel_id] = entry
+            return entry
+
+    def on_channel_removed(self, channel_id):
+        with self._lock:
+            entry = self._by_channel.get(channel_id)
+            if entry is not None:
+                self._drop(entry)
+
+    def on_user_joined(self, user_id, channel_id):
+        with self._lock:
+            entry = self._by_channel.get(channel_id)
+            if entry is not None:
+                entry.members.add(user_id)
+
+    def on_user_left(self, user_id, channel_id):
+        """Records a user leaving a channel. Returns the channel id if it was ours and is now empty."""
+        with self._lock:
+            entry = self._by_channel.get(channel_id)
+            if entry is None:
+                return None
+            entry.members.discard(user_id)
+            if entry.members:
+                return None
+            self._drop(entry)
+            return channel_id
+
+    def on_user_logged_out(self, user_id):
+        """Records a user going offline. Returns the id of their private channel if nobody is left in it."""
+        with self._lock:
+            entry = self._by_user.get(user_id)
+            if entry is None or entry.channel_id is None:
+                return None
+            entry.members.discard(user_id)
+            if entry.members:
+                return None
+            self._drop(entry)
+            return entry.channel_id
+
+    def __len__(self):
+        return len(self._by_channel) + len(self._pending)
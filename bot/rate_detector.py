@@ -0,0 +1,81 @@
+import time
+from collections import deque
+from threading import Lock
+
+
+class RateDetector:
+    """
+    Counts events per key (a user id, for instance) over a sliding window of
+    `window` seconds.
+
+    Each key keeps a ring buffer of its last `limit` timestamps, so recording
+    an event is O(1) amortized and memory per key is bounded no matter how
+    fast events arrive. `hit()` returns how many events the key had in the
+    window, including this one; reaching `limit` means the key is flooding.
+    Callers drive it straight from the events they care about, so nothing
+    has to poll, and `prune()` drops keys that have gone quiet.
+
+    `warn_once()` lets callers warn a key a single time while it stays
+    active, however its count moves around the warning threshold.
+    """
+    MIN_WINDOW = 0.001
+
+    def __init__(self, limit, window):
+        self.limit = max(1, limit)
+        # A zero window would drop every event as soon as it is recorded.
+        self.window = max(self.MIN_WINDOW, window)
+        self._lock = Lock()
+        self._events = {}
+        self._warned = set()
+
+    def hit(self, key, now=None):
+        """Records an event for `key` and returns the number of events it had in the window."""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                events = self._events[key] = deque(maxlen=self.limit)
+            events.append(now)
+            cutoff = now - self.window
+            while events and events[0] <= cutoff:
+                events.popleft()
+            return len(events)
+
+    def count(self, key, now=None):
+        """Returns the number of events `key` had in the window, without recording one."""
+        if now is None:
+            now = time.monotonic()
+        cutoff = now - self.window
+        with self._lock:
+            events = self._events.get(key)
+            if not events:
+                return 0
+            return sum(1 for timestamp in events if timestamp > cutoff)
+
+    def warn_once(self, key):
+        """Returns True the first time it is called for a key, until the key is forgotten or pruned."""
+        with self._lock:
+            if key in self._warned:
+                return False
+            self._warned.add(key)
+            return True
+
+    def forget(self, key):
+        with self._lock:
+            self._events.pop(key, None)
+            self._warned.discard(key)
+
+    def prune(self, now=None):
+        """Drops the keys whose most recent event has left the window."""
+        if now is None:
+            now = time.monotonic()
+        cutoff = now - self.window
+        with self._lock:
+            idle = [key for key, events in self._events.items() if not events or events[-1] <= cutoff]
+            for key in idle:
+                del self._events[key]
+                self._warned.discard(key)
+
+    def __len__(self):
+        return len(self._events)
@@ -0,0 +1,91 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+
+SANCTION_COLUMNS = ("id", "kind", "nickname", "username", "ip_address", "duration", "expires_at", "ban_type", "label", "created_at")
+
+
+class SanctionJournal:
+    """
+    Persists the sanction store to an SQLite database (WAL mode) so kicks and
+    bans survive a restart or crash.
+
+    Writes are queued and committed by a background thread in batches, one
+    transaction (and one fsync) per `flush_interval`, so a ban storm never
+    waits on disk I/O in the thread that issued the bans.
+    """
+    def __init__(self, path="sanctions.db", flush_interval=0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sanctions ("
+                "id INTEGER PRIMARY KEY, kind TEXT NOT NULL, nickname TEXT, username TEXT, ip_address TEXT, "
+                "duration REAL, expires_at REAL, ban_type INTEGER, label TEXT, created_at REAL)"
+            )
+        self._thread = threading.Thread(target=self._writer, name="TTBot_SanctionJournal", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def load(self):
+        """Returns every journaled sanction as a list of dicts."""
+        connection = self._connect()
+        try:
+            rows = connection.execute(f"SELECT {', '.join(SANCTION_COLUMNS)} FROM sanctions ORDER BY id").fetchall()
+        finally:
+            connection.close()
+        return [dict(zip(SANCTION_COLUMNS, row)) for row in rows]
+
+    def record_add(self, sanction):
+        self._queue.put(("add", sanction.to_dict()))
+
+    def record_remove(self, sanction):
+        self._queue.put(("remove", sanction.id))
+
+    def _writer(self):
+        connection = self._connect()
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                running = False
+            try:
+                with connection:
+                    for op in batch:
+                        if op is None:
+                            continue
+                        action, payload = op
+                        if action == "add":
+                            connection.execute(
+                                f"INSERT OR REPLACE INTO sanctions ({', '.join(SANCTION_COLUMNS)}) VALUES ({', '.join('?' * len(SANCTION_COLUMNS))})",
+                                [payload[column] for column in SANCTION_COLUMNS],
+                            )
+                        else:
+                            connection.execute("DELETE FROM sanctions WHERE id = ?", (payload,))
+            except sqlite3.Error:
+                logging.error(f"Failed to write sanction journal batch of {len(batch)} entries:\n{traceback.format_exc()}")
+        connection.close()
+
+    def close(self):
+        """Flushes any queued writes and stops the writer thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
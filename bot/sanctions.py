@@ -0,0 +1,174 @@
+import heapq
+import itertools
+import time
+from threading import RLock
+
+
+class Sanction:
+    """A single kick or ban, matched against users by nickname, username and/or IP address."""
+    KICK = "kick"
+    PENDING_KICK = "pending_kick"
+    BAN = "ban"
+
+    def __init__(self, sanction_id, kind, nickname=None, username=None, ip_address=None,
+                 duration=None, expires_at=None, ban_type=None, label=None, created_at=None):
+        self.id = sanction_id
+        self.kind = kind
+        self.nickname = nickname or None
+        self.username = username or None
+        self.ip_address = ip_address or None
+        self.duration = duration
+        self.expires_at = expires_at
+        self.ban_type = ban_type
+        # A display name for messages; unlike the identifiers above it is not matched against.
+        self.label = label or self.nickname or self.username or self.ip_address
+        self.created_at = created_at if created_at is not None else time.time()
+
+    def is_active(self, now=None):
+        return self.expires_at is None or (now or time.time()) < self.expires_at
+
+    def to_dict(self):
+        return {
+            "id": self.id, "kind": self.kind, "nickname": self.nickname, "username": self.username,
+            "ip_address": self.ip_address, "duration": self.duration, "expires_at": self.expires_at,
+            "ban_type": self.ban_type, "label": self.label, "created_at": self.created_at,
+        }
+
+
+class SanctionStore:
+    """
+    Holds every active kick, pending kick and ban in one place.
+
+    Sanctions are indexed by nickname (case-insensitive), username
+    (case-insensitive) and IP address, so a login only needs three dict
+    lookups however many sanctions are active. Timed sanctions are also
+    kept in a min-heap on their expiry time so `expire()` only touches the
+    sanctions that have actually run out.
+
+    If a `journal` is given, every add and remove is recorded in it and
+    `restore()` can rebuild the store from it at startup.
+    """
+    def __init__(self, journal=None):
+        self.journal = journal
+        self._lock = RLock()
+        self._sanctions = {}
+        self._by_nickname = {}
+        self._by_username = {}
+        self._by_ip = {}
+        self._expiry_heap = []
+        self._ids = itertools.count(1)
+
+    @staticmethod
+    def _fold(value):
+        return value.casefold() if value else None
+
+    def _index_entries(self, sanction):
+        return (
+            (self._by_nickname, self._fold(sanction.nickname)),
+            (self._by_username, self._fold(sanction.username)),
+            (self._by_ip, sanction.ip_address),
+        )
+
+    def add(self, kind, nickname=None, username=None, ip_address=None, duration=None, ban_type=None, expires_at=None, label=None):
+        """Adds a sanction. `duration` (seconds) sets the expiry unless `expires_at` is given."""
+        if expires_at is None and duration is not None:
+            expires_at = time.time() + duration
+        with self._lock:
+            sanction = Sanction(next(self._ids), kind, nickname, username, ip_address, duration, expires_at, ban_type, label)
+            self._insert(sanction)
+            # Journaled under the lock, so a remove can never reach the journal before its add.
+            if self.journal:
+                self.journal.record_add(sanction)
+        return sanction
+
+    def restore(self, records):
+        """Loads previously journaled sanctions (dicts from `Sanction.to_dict`) without re-journaling them."""
+        with self._lock:
+            for record in records:
+                self._insert(Sanction(record["id"], record["kind"], record["nickname"], record["username"],
+                                      record["ip_address"], record["duration"], record["expires_at"],
+                                      record["ban_type"], record["label"], record["created_at"]))
+            next_id = max(self._sanctions, default=0) + 1
+            self._ids = itertools.count(next_id)
+
+    def _insert(self, sanction):
+        self._sanctions[sanction.id] = sanction
+        for index, key in self._index_entries(sanction):
+            if key:
+                index.setdefault(key, set()).add(sanction.id)
+        if sanction.expires_at is not None:
+            heapq.heappush(self._expiry_heap, (sanction.expires_at, sanction.id))
+
+    def remove(self, sanction):
+        with self._lock:
+            if self._sanctions.pop(sanction.id, None) is None:
+                return False
+            for index, key in self._index_entries(sanction):
+                ids = index.get(key)
+                if ids is None:
+                    continue
+                ids.discard(sanction.id)
+                if not ids:
+                    del index[key]
+            # The heap entry is left behind and skipped when it reaches the top.
+            if self.journal:
+                self.journal.record_remove(sanction)
+        return True
+
+    def find(self, nickname=None, username=None, ip_address=None, kinds=None):
+        """Returns active sanctions matching any of the given identifiers, oldest first."""
+        now = time.time()
+        with self._lock:
+            ids = set()
+            for index, key in ((self._by_nickname, self._fold(nickname)),
+                               (self._by_username, self._fold(username)),
+                               (self._by_ip, ip_address)):
+                if key and key in index:
+                    ids.update(index[key])
+            matches = [self._sanctions[sanction_id] for sanction_id in ids]
+        matches = [s for s in matches if s.is_active(now) and (kinds is None or s.kind in kinds)]
+        return sorted(matches, key=lambda s: s.id)
+
+    def find_target(self, target, kinds=None):
+        """Finds sanctions where `target` is the nickname, username or IP address."""
+        return self.find(nickname=target, username=target, ip_address=target, kinds=kinds)
+
+    def next_expiry(self):
+        """Returns the earliest expiry time among pending timed sanctions, or None."""
+        with self._lock:
+            while self._expiry_heap:
+                expires_at, sanction_id = self._expiry_heap[0]
+                sanction = self._sanctions.get(sanction_id)
+                if sanction is not None and sanction.expires_at == expires_at:
+                    return expires_at
+                heapq.heappop(self._expiry_heap)
+            return None
+
+    def expire(self, now=None):
+        """Removes and returns every sanction whose expiry time has passed."""
+        now = now or time.time()
+        expired = []
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, sanction_id = heapq.heappop(self._expiry_heap)
+                sanction = self._sanctions.get(sanction_id)
+                if sanction is None or sanction.expires_at != expires_at:
+                    continue
+                self.remove(sanction)
+                expired.append(sanction)
+        return expired
+
+    def all(self, kinds=None):
+        with self._lock:
+            sanctions = list(self._sanctions.values())
+        return [s for s in sanctions if kinds is None or s.kind in kinds]
+
+    def clear(self, kinds=None):
+        """Removes every sanction (of the given kinds) and returns them."""
+        removed = self.all(kinds)
+        for sanction in removed:
+            self.remove(sanction)
+        return removed
+
+    def __len__(self):
+        return len(self._sanctions)
@@ -0,0 +1,92 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+import traceback
+
+
+class ScheduledTask:
+    """A handle to a delayed action queued on the `Scheduler`."""
+    def __init__(self, task_id, run_at, callback, args, name):
+        self.id = task_id
+        self.run_at = run_at
+        self.callback = callback
+        self.args = args
+        self.name = name or getattr(callback, "__name__", "task")
+        self.cancelled = False
+        self.done = False
+
+    def cancel(self):
+        """Prevents the task from running. Returns False if it already ran."""
+        if self.done:
+            return False
+        self.cancelled = True
+        return True
+
+    def remaining(self):
+        """Seconds until the task runs, never negative."""
+        return max(0.0, self.run_at - time.time())
+
+
+class Scheduler:
+    """
+    Runs delayed actions (timed unbans, file deletions, ...) from a single
+    thread, ordered by a min-heap on their due time. However many actions
+    are pending, the scheduler only ever uses one thread.
+    """
+    def __init__(self, name="TTBot_Scheduler"):
+        self._heap = []
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def schedule_at(self, run_at, callback, *args, name=None):
+        """Schedules `callback(*args)` at the given wall-clock time (time.time())."""
+        with self._condition:
+            task = ScheduledTask(next(self._ids), run_at, callback, args, name)
+            heapq.heappush(self._heap, (run_at, task.id, task))
+            self._condition.notify()
+        return task
+
+    def schedule(self, delay_seconds, callback, *args, name=None):
+        """Schedules `callback(*args)` to run after `delay_seconds`."""
+        return self.schedule_at(time.time() + delay_seconds, callback, *args, name=name)
+
+    def list_tasks(self):
+        """Returns the pending (not cancelled) tasks, soonest first."""
+        with self._condition:
+            entries = sorted(self._heap)
+        return [task for _, _, task in entries if not task.cancelled]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running:
+                    if self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                        continue
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    delay = self._heap[0][0] - time.time()
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay)
+                if not self._running:
+                    return
+                _, _, task = heapq.heappop(self._heap)
+                task.done = True
+
+            try:
+                task.callback(*task.args)
+            except Exception:
+                logging.error(f"Exception in scheduled task '{task.name}':\n{traceback.format_exc()}")
+
+    def shutdown(self):
+        """Stops the scheduler thread; pending tasks are discarded."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
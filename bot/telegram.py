@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+import traceback
+from collections import OrderedDict
+import requests
+
+
+class TelegramNotifier:
+    """
+    Sends Telegram notifications from a background thread so nothing that
+    reports a login ever waits on the Telegram API.
+
+    Messages queued for the same chat within `batch_delay` seconds of each
+    other are joined into one message (up to Telegram's length limit), so a
+    server restart that brings back many watched users sends each chat one
+    summary instead of a burst that Telegram would throttle. Requests go
+    through one reused `requests.Session`. Failed sends are retried with
+    exponential backoff, honouring the `retry_after` Telegram returns when
+    it rate limits the bot; client errors such as an unknown chat id are
+    logged and dropped.
+    """
+    API_URL = "https://api.telegram.org/bot{token}/sendMessage"
+    MAX_MESSAGE_LENGTH = 4096
+
+    def __init__(self, token, batch_delay=2.0, max_attempts=5, backoff=2.0, timeout=10):
+        self.token = token
+        self.batch_delay = batch_delay
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._pending = OrderedDict()
+        self._condition = threading.Condition()
+        self._running = True
+        self._sending = False
+        self.sent = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name="TTBot_Telegram", daemon=True)
+        self._thread.start()
+
+    @property
+    def enabled(self):
+        return bool(self.token)
+
+    def notify(self, chat_id, text):
+        """Queues a message for a chat and returns immediately."""
+        if not self.enabled or not chat_id:
+            return
+        with self._condition:
+            if not self._running:
+                return
+            self._pending.setdefault(str(chat_id), []).append(text)
+            self._condition.notify_all()
+
+    def _batches(self, messages):
+        """Joins a chat's queued messages into as few Telegram messages as fit."""
+        batch = ""
+        for text in messages:
+            text = text[:self.MAX_MESSAGE_LENGTH]
+            if batch and len(batch) + 1 + len(text) > self.MAX_MESSAGE_LENGTH:
+                yield batch
+                batch = ""
+            batch = f"{batch}\n{text}" if batch else text
+        if batch:
+            yield batch
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                # Give the rest of a burst a moment to arrive, so it goes out as one message per chat.
+                batch_deadline = time.monotonic() + self.batch_delay
+                while self._running:
+                    remaining = batch_deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                pending = self._pending
+                self._pending = OrderedDict()
+                self._sending = True
+
+            for chat_id, messages in pending.items():
+                for text in self._batches(messages):
+                    self._send(chat_id, text)
+            with self._condition:
+                self._sending = False
+                self._condition.notify_all()
+
+    def _send(self, chat_id, text):
+        url = self.API_URL.format(token=self.token)
+        delay = self.backoff
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self._session.post(url, json={"chat_id": chat_id, "text": text}, timeout=self.timeout)
+                if response.status_code == 429:
+                    delay = max(delay, self._retry_after(response))
+                elif 400 <= response.status_code < 500:
+                    self.failed += 1
+                    print(f"Error sending Telegram notification to {chat_id}: {response.status_code} {response.text}")
+                    return
+                else:
+                    response.raise_for_status()
+                    self.sent += 1
+                    return
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Telegram notification to {chat_id} failed (attempt {attempt}): {e}")
+            except Exception:
+                logging.error(f"Unexpected error sending Telegram notification:\n{traceback.format_exc()}")
+                break
+            if attempt < self.max_attempts:
+                time.sleep(delay)
+                delay *= 2
+        self.failed += 1
+        print(f"Error sending Telegram notification to {chat_id}: giving up after {self.max_attempts} attempts")
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return float(response.json().get("parameters", {}).get("retry_after", 0))
+        except (ValueError, AttributeError):
+            return 0
+
+    def shutdown(self, flush_timeout=0.0):
+        """Stops the notifier, first waiting up to `flush_timeout` seconds for queued messages to go out."""
+        deadline = time.monotonic() + flush_timeout
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            while (self._pending or self._sending) and time.monotonic() < deadline:
+                self._condition.wait(deadline - time.monotonic())
+            if self._pending or self._sending:
+                return # Still sending; the daemon thread ends with the process
+        self._session.close()
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*
-from TeamTalk5 import TeamTalk, User, UserType, UserAccount, UserRight, TextMessage, ttstr, TextMsgType, Subscription, TTMessage, VideoCodec, Channel, ChannelType, AudioCodec, OpusCodec, Codec, OPUS_APPLICATION_VOIP, BanType
+from TeamTalk5 import TeamTalk, User, UserAccount, UserRight, TextMessage, ttstr, TextMsgType, Subscription, TTMessage, VideoCodec, Channel, ChannelType, AudioCodec, OpusCodec, Codec, OPUS_APPLICATION_VOIP, BanType
 import TeamTalk5
 from bot.command_handler import CommandHandler
 from bot.utils import BotUtils as utils, LoggingThreadPoolExecutor
@@ -10,12 +10,25 @@ from bot.modules.tts import TTSCog
 from bot.modules.player import PlayerCog
 from bot.modules.translator import TranslatorCog
 from bot.user_manager import UserManager
+from bot.event_pipeline import EventPipeline, snapshot_user
+from bot.user_index import UserIndex
+from bot.permissions import PermissionCache
+from bot.channel_directory import ChannelDirectory
+from bot.membership import NameSet, IPSet
+from bot.telegram import TelegramNotifier
+from bot.blacklist import Blacklist
+from bot.scheduler import Scheduler
+from bot.ip_intel import IPIntelCache
+from bot.geoip import GeoLocator, open_geoip_database
+from bot.vpn_screening import VPNScreener
+from bot.command_tracker import CommandTracker
+from bot.outbox import Outbox, split_text
 import gettext
 import logging
 import time
 import traceback
 from datetime import datetime
-import os, sys, re, configparser, argparse
+import os, sys, configparser, argparse
 import random
 import threading
 from threading import Thread, Lock
@@ -24,6 +37,13 @@ from bot.player import Player
 
 
 class TTUtilities(TeamTalk):
+    # Pacing for the bulk subscription issued after the bot logs in.
+    SUBSCRIBE_BATCH_SIZE = 20
+    SUBSCRIBE_BATCH_DELAY = 0.2
+    # Outgoing text message rate (packets per second) and burst size, kept under the server's flood protection.
+    OUTBOX_RATE = 8.0
+    OUTBOX_BURST = 10
+
     def __init__(self, config_handler, account_creator, cookiefile=None):
         self.config_handler = config_handler
         self.account_creator = account_creator
@@ -40,12 +60,32 @@ class TTUtilities(TeamTalk):
         self.teamtalk_license_config = self.config_handler.get_teamtalk_license_config()
         self.cookiefile = cookiefile or self.playback_config.get("cookiefile_path")
 
+        self.connected = False
         self.io_pool = None
         self.quick_task_pool = None
+        self.event_pipeline = None
+        self.outbox = None
         self.player = Player(self.config_handler, cookiefile=self.cookiefile)
         self.command_handler = CommandHandler(self, prefix='/')
         self.commands_locked = False
+        self.housekeeping_tasks = []
+        self.user_index = UserIndex()
+        self.permissions = PermissionCache(self.accounts_config, self.user_index)
+        self.channel_directory = ChannelDirectory()
+        self.blacklist = Blacklist("blacklist.txt")
+        self.scheduler = Scheduler()
+        self.ip_cache = IPIntelCache(utils.fetch_ip_info, "ip_cache.json", batch_fetcher=utils.fetch_ip_info_batch)
+        self.register_housekeeping(self.ip_cache.save, 300)
+        self.geolocator = GeoLocator(open_geoip_database(self.bot_config["geoip_database"]), self.ip_cache,
+                                     remote_fallback=self.bot_config["geoip_remote_fallback"])
+        self.telegram = TelegramNotifier(self.telegram_config["telegram_bot_token"])
+        self.command_tracker = CommandTracker(timeout=10.0)
+        self.register_housekeeping(self.command_tracker.expire, 1)
+        self.subscription_lock = Lock()
+        self.subscribed_user_ids = set()
+        self.subscription_commands_issued = 0
         self.initialize_connection()
+        self.refresh_membership_sets()
         self._register_cogs()
 
     def initialize_connection(self):
@@ -54,12 +94,15 @@ class TTUtilities(TeamTalk):
         This method is safe to call multiple times (after a shutdown).
         """
         super().__init__()
+        self.connected = True
         self.io_pool = LoggingThreadPoolExecutor(max_workers=10, thread_name_prefix='TTBot_IO')
         self.quick_task_pool = LoggingThreadPoolExecutor(max_workers=5, thread_name_prefix='TTBot_Quick')
+        self.event_pipeline = EventPipeline()
+        self.outbox = Outbox(self._deliver_text, rate=self.OUTBOX_RATE, burst=self.OUTBOX_BURST)
         
         self.just_joined = True
-        self.last_command_sender_id = None
-        self.last_command_sender_username = None
+        with self.subscription_lock:
+            self.subscribed_user_ids.clear()
 
         # Set language
         self.language = self.bot_config.get("language")
@@ -96,14 +139,24 @@ class TTUtilities(TeamTalk):
             logging.error(f"Connection failed during initialization: {e}")
             print(self._("Error: Connection failed. Check server details or network. See errors.log for details."))
 
-    def shutdown(self):
-        """Cleanly shuts down all resources used by the bot instance."""
+    def shutdown(self, final=True):
+        """
+        Cleanly shuts down all resources used by the bot instance.
+        With final=False (a reconnect), the scheduler keeps running so timed actions survive.
+        """
         print("Shutdown sequence started.")
+        # Tasks still running on the scheduler must not touch the SDK instance once it is closed.
+        self.connected = False
         try:
             print("Terminating media player...")
             self.player.terminate()
             print("Media player terminated.")
 
+            if self.outbox:
+                print("Sending queued messages...")
+                self.outbox.shutdown(flush_timeout=2.0 if final else 0.0)
+                print("Outbox stopped.")
+
             print("Disconnecting from TeamTalk server...")
             self.disconnect()
             print("Disconnected from server.")
@@ -122,6 +175,34 @@ class TTUtilities(TeamTalk):
                 self.quick_task_pool.shutdown(wait=False)
                 print("Quick task thread pool shutdown initiated.")
 
+            if self.event_pipeline:
+                print("Shutting down event pipeline...")
+                self.event_pipeline.shutdown()
+                print("Event pipeline shutdown initiated.")
+
+            if final:
+                print("Stopping VPN screening...")
+                self.vpn_screener.shutdown()
+                print("VPN screening stopped.")
+
+                print("Stopping scheduler...")
+                self.scheduler.shutdown()
+                print("Scheduler stopped.")
+
+                print("Flushing sanction journal...")
+                self.admin_cog.sanction_journal.close()
+                print("Sanction journal closed.")
+
+                print("Sending Telegram notifications...")
+                self.telegram.shutdown(flush_timeout=5.0)
+                self.user_manager.login_watches.save()
+                print("Telegram notifications sent.")
+
+                print("Saving IP cache...")
+                self.ip_cache.close()
+                self.geolocator.close()
+                print("IP cache saved.")
+
             print("Shutdown complete.")
         except Exception as e:
             logging.error(f"Error during shutdown: {e}")
@@ -130,6 +211,7 @@ class TTUtilities(TeamTalk):
 
     def _register_cogs(self):
         """Initializes and registers all command cogs."""
+        self.vpn_screener = VPNScreener(self)
         self.general_cog = GeneralCog(self)
         self.user_manager = UserManager(self)
         self.tts_cog = TTSCog(self)
@@ -152,6 +234,28 @@ class TTUtilities(TeamTalk):
             cog.register(self.command_handler)    
         print(self._("All command modules have been registered."))
 
+    def register_housekeeping(self, callback, interval_seconds):
+        """Registers a callback to be run between event batches at most every `interval_seconds`."""
+        self.housekeeping_tasks.append({"callback": callback, "interval": interval_seconds, "last_run": time.monotonic()})
+
+    def run_housekeeping(self):
+        """Runs every registered housekeeping callback whose interval has elapsed."""
+        now = time.monotonic()
+        for task in self.housekeeping_tasks:
+            if now - task["last_run"] < task["interval"]:
+                continue
+            task["last_run"] = now
+            try:
+                task["callback"]()
+            except Exception as e:
+                logging.error(f"Error in housekeeping task '{task['callback'].__name__}': {e}")
+
+    def runEventLoopBatch(self, max_events=100, budget_ms=50, nWaitMSec=-1):
+        """Drains a batch of pending events, then runs any due housekeeping tasks."""
+        processed = super().runEventLoopBatch(max_events, budget_ms, nWaitMSec)
+        self.run_housekeeping()
+        return processed
+
     def onConnectSuccess(self):
         print(self._("Connected successfully!"))
         self.doLogin(ttstr(self.bot_config["nickname"]), ttstr(self.server_config["username"]), ttstr(self.server_config["password"]), ttstr(self.bot_config["client_name"]))
@@ -165,22 +269,39 @@ class TTUtilities(TeamTalk):
         print(self._("Connection lost. Trying to reconnect..."))
         self.reconnect()
 
+    def onCmdProcessing(self, cmdId: int, complete: bool):
+        self.command_tracker.on_processing(cmdId, complete)
+
+    def onCmdSuccess(self, cmdId: int):
+        self.command_tracker.on_success(cmdId)
+
+    def onCmdError(self, cmdId: int, errmsg):
+        self.command_tracker.on_error(cmdId, errmsg.nErrorNo, ttstr(errmsg.szErrorMsg))
+
     def reconnect(self):
         """Performs a full, in-process reconnect by shutting down and re-initializing."""
         print(self._("Connection lost. Attempting to reconnect in 5 seconds..."))
-        self.shutdown()
+        self.shutdown(final=False)
+        self.user_index.clear()
+        self.channel_directory.clear()
+        self.permissions.clear()
+        self.command_tracker.fail_all("Connection lost")
         time.sleep(5)
         self.initialize_connection()
     
     def onCmdMyselfLoggedIn(self, userid, useraccount):
         print(self._("Logged in successfully"))
+        self.user_index.resync(self.getServerUsers())
+        self.channel_directory.load(self.getServerChannels())
+        # Lift bans that ran out while we were offline and arm the next expiry.
+        self.admin_cog.expire_sanctions()
         channel_id = self.getChannelIDFromPath(ttstr(self.bot_config['default_channel']))
 
         if channel_id == 0 or channel_id is None:
             print(self._("Error: Could not get channel ID for default channel."))
         else:
             self.doJoinChannelByID(channel_id, ttstr(self.bot_config['channel_password']))
-        self.subscribe_user_messages()
+        self.quick_task_pool.submit(self.subscribe_user_messages)
         self.subscribe_channel_messages()
         if self.bot_config["status_message"] is not None:
             self.doChangeStatus(ttstr(self.bot_config["gender"]), ttstr(self.bot_config["status_message"]))
@@ -206,14 +327,33 @@ class TTUtilities(TeamTalk):
 
         self.config_handler.read_config_file()
 
-    def subscribe_user_messages(self):
-        users = self.getServerUsers()
+    def subscribe_user(self, user):
+        """Subscribes to a single user's messages, unless that was already done this session."""
+        with self.subscription_lock:
+            # A login queued on the moderation lane can run after the user has logged out;
+            # recording the id then would leave the next user given that id unsubscribed.
+            if user.nUserID in self.subscribed_user_ids or self.user_index.get(user.nUserID) is None:
+                return False
+            self.subscribed_user_ids.add(user.nUserID)
+
+        self.doSubscribe(user.nUserID, Subscription.SUBSCRIBE_USER_MSG)
+        commands_issued = 1
+        if self.bot_config['intercept_channel_messages'] is True:
+            self.doSubscribe(user.nUserID, 131072)
+            commands_issued += 1
+            print(self._("intercepting channel messages for user {user}").format(user=ttstr(user.szNickname)))
+        with self.subscription_lock:
+            self.subscription_commands_issued += commands_issued
+        return True
 
-        for user in users:
-            self.doSubscribe(user.nUserID, Subscription.SUBSCRIBE_USER_MSG)
-            if self.bot_config['intercept_channel_messages'] is True:
-                self.doSubscribe(user.nUserID, 131072)
-                print(self._("intercepting channel messages for user {user}").format(user=ttstr(user.szNickname)))
+    def subscribe_user_messages(self):
+        """Subscribes to every online user not yet subscribed, pacing the commands in small batches."""
+        subscribed = 0
+        for user in self.user_index.all_users():
+            if self.subscribe_user(user):
+                subscribed += 1
+                if subscribed % self.SUBSCRIBE_BATCH_SIZE == 0:
+                    time.sleep(self.SUBSCRIBE_BATCH_DELAY)
         print(self._("subscribed to user messages"))
 
     def subscribe_channel_messages(self):
@@ -223,52 +363,62 @@ class TTUtilities(TeamTalk):
         print(self._("Subscribed to channel messages"))
 
     def onCmdUserLoggedIn(self, user: User):
+        snapshot = self.user_index.update(user)
+        self.permissions.invalidate(user.nUserID)
         if self.just_joined:
             self.just_joined = False
             return
-            
-        self.subscribe_user_messages()
-        if self.accounts_config['detect_server_admins'] is True and user.uUserType == UserType.USERTYPE_ADMIN:
-            username_lower = ttstr(user.szUsername).lower()
-            if username_lower not in [u.lower() for u in self.accounts_config['authorized_users']]:
-                self.accounts_config['authorized_users'].append(ttstr(user.szUsername))
-
-        if ttstr(user.szUsername) in self.exclusion_config["usernames"] or \
-           ttstr(user.szNickname) in self.exclusion_config["nicknames"] or \
-           ttstr(user.szIPAddress) in self.exclusion_config["ips"]:
+        self.event_pipeline.submit(EventPipeline.MODERATION, self._process_user_login, snapshot)
+
+    def _process_user_login(self, user):
+        """Runs the login checks for a user snapshot on the moderation lane."""
+        self.subscribe_user(user)
+        if self.permissions.is_server_admin(user):
+            self.permissions.add_authorized_user(ttstr(user.szUsername))
+
+        if self.is_excluded(user):
             print(self._("User {nickname} is excluded, skipping checks.").format(nickname=ttstr(user.szNickname)))
             return
 
         user_was_actioned = self.admin_cog.handle_user_login_checks(user)        
         # Only proceed with the welcome message if no action was taken.
+        # Welcome handling and VPN screening do network lookups, so they run off this lane.
         if not user_was_actioned:
-            self.user_manager.on_user_logged_in(user)
+            if self.bot_config["vpn_detection"]:
+                self.vpn_screener.screen(user)
+            self.event_pipeline.submit(EventPipeline.ENRICHMENT, self.user_manager.on_user_logged_in, user)
+
+    def onCmdUserUpdate(self, user: User):
+        self.user_index.update(user)
+        self.permissions.invalidate(user.nUserID)
 
     def onCmdUserJoinedChannel(self, user: User):
-        self.jail_cog.handle_user_join_channel(user)
+        snapshot = self.user_index.update(user)
+        self.user_manager.on_user_joined_channel(user)
+        self.event_pipeline.submit(EventPipeline.MODERATION, self.jail_cog.handle_user_join_channel, snapshot)
 
     def onCmdUserLeftChannel(self, channelid: int, user: User):
-        self.user_manager.on_user_parted(user)
-        self.translator_cog.on_user_parted(user)
-        self.tts_cog.on_user_parted(user)
+        snapshot = self.user_index.update(user)
+        self.user_manager.on_user_left_channel(channelid, user)
+        self.event_pipeline.submit(EventPipeline.MODERATION, self._process_user_parted, snapshot)
 
     def onCmdUserLoggedOut(self, user: User):
+        snapshot = snapshot_user(user)
+        self.user_index.remove(user.nUserID)
+        self.permissions.invalidate(user.nUserID)
+        self.user_manager.on_user_logged_out(user)
+        with self.subscription_lock:
+            self.subscribed_user_ids.discard(user.nUserID)
+        self.event_pipeline.submit(EventPipeline.MODERATION, self._process_user_parted, snapshot)
+
+    def _process_user_parted(self, user):
         self.user_manager.on_user_parted(user)
         self.translator_cog.on_user_parted(user)
         self.tts_cog.on_user_parted(user)
 
-    def split_long_message(self, message, chunk_size=500):
-        chunks = []
-        while message:
-            chunk = message[:chunk_size]
-            message = message[chunk_size:]
-            if message:
-                last_space = chunk.rfind(" ")
-                if last_space != -1:
-                    chunk = chunk[:last_space]
-                    message = chunk[last_space + 1:] + message
-            chunks.append(chunk)
-        return chunks
+    def split_long_message(self, message, max_length=TeamTalk5.TT_STRLEN - 1):
+        """Yields pieces of a message that each fit in one text message; see bot.outbox.split_text."""
+        return split_text(message, max_length)
 
     def onCmdUserTextMessage(self, textmessage: TextMessage):
         message_text = ttstr(textmessage.szMessage)
@@ -277,13 +427,11 @@ class TTUtilities(TeamTalk):
         if self.admin_cog.check_message_for_blacklist(textmessage):
             return
 
-        if self.tts_cog.handle_prefixed_message(textmessage):
-            return
-        if self.player_cog.handle_prefixed_message(textmessage):
-            return
+        if textmessage.nMsgType == TextMsgType.MSGTYPE_CHANNEL:
+            self.jail_cog.handle_channel_message(textmessage)
 
-        if message_text.startswith(self.command_handler.prefix):
-            self.command_handler.handle_message(textmessage)
+        # Commands and the ' + - shortcuts, dispatched on the first character
+        if self.command_handler.route(textmessage, message_text):
             return
 
         self.translator_cog.handle_whisper_translation(textmessage)            
@@ -294,60 +442,82 @@ class TTUtilities(TeamTalk):
         super().onCmdUserTextMessage(textmessage)
 
     def onCmdChannelNew(self, channel: Channel):
-        blacklist = utils.load_blacklist("blacklist.txt")
-        if not blacklist:
-            return
-
-        pattern = r"\b(" + "|".join(blacklist) + r")\b"
-        if re.search(pattern, ttstr(channel.szName), re.IGNORECASE) or re.search(pattern, ttstr(channel.szTopic), re.IGNORECASE):
+        self.channel_directory.update(channel)
+        self.user_manager.on_channel_new(channel)
+        self.command_tracker.add_reply(channel)
+        if self.blacklist.contains(ttstr(channel.szName), ttstr(channel.szTopic)):
             self.doRemoveChannel(channel.nChannelID)
             return
 
+    def onCmdChannelUpdate(self, channel: Channel):
+        self.channel_directory.update(channel)
+
+    def onCmdChannelRemove(self, channel: Channel):
+        self.channel_directory.remove(channel.nChannelID)
+        self.user_manager.on_channel_removed(channel)
+
     def onUserAccount(self, useraccount: UserAccount):
-        username = ttstr(useraccount.szUsername)
-        user_type = useraccount.uUserType
-
-        if username == self.last_command_sender_username:
-            user = self.getUserByUsername(ttstr(username))  # Get the User object
-            if user:
-                nickname = ttstr(user.szNickname)
-                ip_address = ttstr(user.szIPAddress)
-                status_message = ttstr(user.szStatusMsg)
-                password = ttstr(useraccount.szPassword)
-
-                info_message = self._("User Info:\n Nickname: {nickname}\n Username: {username}\n Password: {password}\n  IP Address: {ip_address}\n Status Message: {status_message}").format(nickname=nickname, username=username, password=password, status_message=status_message, ip_address=ip_address)
-                self.privateMessage(self.last_command_sender_id, info_message)
-                self.last_command_sender_id = None
-                self.last_command_sender_username = None
+        self.command_tracker.add_reply(useraccount)
+
+    def refresh_membership_sets(self):
+        """Rebuilds the lookup sets for the jail and exclusion lists from the current config."""
+        self.jailed_usernames = NameSet(self.bot_config["jail_users"])
+        self.jailed_nicknames = NameSet(self.bot_config["jail_names"])
+        self.excluded_usernames = NameSet(self.exclusion_config["usernames"])
+        self.excluded_nicknames = NameSet(self.exclusion_config["nicknames"])
+        self.excluded_ips = IPSet(self.exclusion_config["ips"])
+        if self.excluded_ips.invalid:
+            print(self._("Ignoring invalid excluded IP addresses: {entries}").format(entries=", ".join(self.excluded_ips.invalid)))
+
+    def save_bot_config(self):
+        """Saves the bot config section and brings the lookup sets derived from it up to date."""
+        self.config_handler.save_bot_config(self.bot_config)
+        self.refresh_membership_sets()
+
+    def is_jailed(self, user):
+        return ttstr(user.szUsername) in self.jailed_usernames or ttstr(user.szNickname) in self.jailed_nicknames
+
+    def is_excluded(self, user):
+        """Returns True if a user is exempt from moderation by username, nickname, or IP address or network."""
+        return ttstr(user.szUsername) in self.excluded_usernames or \
+               ttstr(user.szNickname) in self.excluded_nicknames or \
+               ttstr(user.szIPAddress) in self.excluded_ips
+
+    def getChannelIDFromPath(self, szChannelPath):
+        """Resolves a channel path from the channel directory, asking the client only for channels it doesn't know yet."""
+        channel_id = self.channel_directory.get_id(ttstr(szChannelPath))
+        if channel_id:
+            return channel_id
+        return super().getChannelIDFromPath(szChannelPath)
+
+    def getRootChannelID(self):
+        return self.channel_directory.root_id or super().getRootChannelID()
 
     def getUserByName(self, nickname):
-        nickname = ttstr(nickname)
-        users = self.getServerUsers()
-        for user in users:
-            if user.szNickname.strip() == nickname:
-                return user
-        return None
-
-    def privateMessage(self, user_id, message_text):
-        message = TextMessage()
-        message.nMsgType = 1
-        message.nToUserID = user_id
-        message.nFromUserID = self.getMyUserID()
-        message.szMessage = ttstr(message_text)
-        self.doTextMessage(message)
+        """Looks up an online user by nickname (case-insensitive) in the user index."""
+        return self.user_index.get_by_nickname(nickname)
 
-    def send_message(self, message_text, channel_id=None):
+    def privateMessage(self, user_id, message_text, priority=Outbox.NORMAL):
+        self.outbox.put((TextMsgType.MSGTYPE_USER, user_id), message_text, priority)
+
+    def send_message(self, message_text, channel_id=None, priority=Outbox.NORMAL):
         if channel_id is None:
             channel_id=self.getMyChannelID()
-        message = TextMessage()
-        message.nMsgType = TextMsgType.MSGTYPE_CHANNEL
-        message.nChannelID = channel_id
-        message.szMessage = ttstr(message_text)
-        self.doTextMessage(message)
+        self.outbox.put((TextMsgType.MSGTYPE_CHANNEL, channel_id), message_text, priority)
+
+    def send_broadcast_message(self, message_text, priority=Outbox.BROADCAST):
+        self.outbox.put((TextMsgType.MSGTYPE_BROADCAST, 0), message_text, priority)
 
-    def send_broadcast_message(self, message_text):
+    def _deliver_text(self, destination, message_text):
+        """Sends one packet from the outbox."""
+        msg_type, target_id = destination
         message = TextMessage()
-        message.nMsgType = TextMsgType.MSGTYPE_BROADCAST
+        message.nMsgType = msg_type
+        if msg_type == TextMsgType.MSGTYPE_USER:
+            message.nToUserID = target_id
+            message.nFromUserID = self.getMyUserID()
+        elif msg_type == TextMsgType.MSGTYPE_CHANNEL:
+            message.nChannelID = target_id
         message.szMessage = ttstr(message_text)
         self.doTextMessage(message)
 
@@ -356,40 +526,9 @@ class TTUtilities(TeamTalk):
         self.doKickUser(user_id, user_channel_id)
         self.doKickUser(user_id, 0)
 
-    def ban_user(self, user_id, ban_type=BanType.BANTYPE_USERNAME):
-        banned_user = BannedUser()
-        while True:
-            user = self.getUser(user_id)
-            if user is not None:
-                break
-            else:
-                continue
-        if ban_type == BanType.BANTYPE_IPADDR:
-            while True:
-                ip_address=user.szIPAddress
-                if ip_address is None or ip_address == "":
-                    continue
-                else:
-                    banned_user.szIPAddress =ip_address
-                    break
-            self.banned_users[user.szIPAddress] = banned_user
-            banned_user.uBanTypes =BanType.BANTYPE_IPADDR
-        else:
-            if user.szUsername=='guest' or user.szUsername==self.accounts_config['custom_username']:
-                while True:
-                    ip_address=user.szIPAddress
-                    if ip_address is None or ip_address == "":
-                        continue
-                    else:
-                        banned_user.szIPAddress =ip_address
-                        break
-                self.banned_users[user.szIPAddress] = banned_user
-                banned_user.uBanTypes =BanType.BANTYPE_IPADDR
-            else:
-                banned_user.szUsername = user.szUsername
-                self.banned_users[user.szUsername] = banned_user
-                banned_user.uBanTypes =BanType.BANTYPE_USERNAME
-        self.doBan(banned_user)
+    def ban_user(self, user_id, ban_type=BanType.BANTYPE_USERNAME, user=None):
+        """Bans a user; see AdminCog.ban_user."""
+        return self.admin_cog.ban_user(user_id, ban_type, user=user)
 
     def send_broadcast_messages_at_intervals(self, messages):
         random.seed()
@@ -403,7 +542,8 @@ class TTUtilities(TeamTalk):
                 time.sleep(self.bot_config["random_message_interval"] * 60)
 
     def get_random_nickname(self):
-        online_users = [u for u in self.getServerUsers() if u.nUserID != self.getMyUserID()]
+        my_user_id = self.getMyUserID()
+        online_users = [u for u in self.user_index.all_users() if u.nUserID != my_user_id]
         if online_users:
             random_user = random.choice(online_users)
             return random_user.szNickname
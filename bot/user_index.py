@@ -0,0 +1,113 @@
+from threading import Lock
+from TeamTalk5 import ttstr
+from bot.event_pipeline import snapshot_user
+
+
+class UserIndex:
+    """
+    An in-memory index of the users online on the server, kept up to date from
+    TeamTalk user events so lookups don't have to copy the whole user list
+    out of the client with getServerUsers().
+
+    Users are stored as `UserSnapshot` records and can be looked up by user id,
+    nickname (case-insensitive), username or IP address.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._users = {}
+        self._by_nickname = {}
+        self._by_username = {}
+        self._by_ip = {}
+
+    @staticmethod
+    def _nickname_key(nickname):
+        return nickname.strip().casefold()
+
+    def _keys_for(self, snapshot):
+        return (
+            (self._by_nickname, self._nickname_key(ttstr(snapshot.szNickname))),
+            (self._by_username, ttstr(snapshot.szUsername)),
+            (self._by_ip, ttstr(snapshot.szIPAddress)),
+        )
+
+    def _add(self, snapshot):
+        self._users[snapshot.nUserID] = snapshot
+        for index, key in self._keys_for(snapshot):
+            if key:
+                index.setdefault(key, set()).add(snapshot.nUserID)
+
+    def _remove(self, user_id):
+        snapshot = self._users.pop(user_id, None)
+        if snapshot is None:
+            return
+        for index, key in self._keys_for(snapshot):
+            ids = index.get(key)
+            if ids is None:
+                continue
+            ids.discard(user_id)
+            if not ids:
+                del index[key]
+
+    def update(self, user):
+        """Adds or refreshes a user from a ctypes `User` or a `UserSnapshot`."""
+        snapshot = user if hasattr(user, "captured_at") else snapshot_user(user)
+        with self._lock:
+            self._remove(snapshot.nUserID)
+            self._add(snapshot)
+        return snapshot
+
+    def remove(self, user_id):
+        with self._lock:
+            self._remove(user_id)
+
+    def resync(self, users):
+        """Rebuilds the index from a full user list, e.g. getServerUsers() after a (re)connect."""
+        with self._lock:
+            self._users.clear()
+            self._by_nickname.clear()
+            self._by_username.clear()
+            self._by_ip.clear()
+            for user in users:
+                self._add(snapshot_user(user))
+
+    def clear(self):
+        self.resync([])
+
+    def get(self, user_id):
+        return self._users.get(user_id)
+
+    def _first(self, index, key):
+        with self._lock:
+            ids = index.get(key)
+            if not ids:
+                return None
+            return self._users.get(next(iter(ids)))
+
+    def get_by_nickname(self, nickname):
+        """Returns the user with this nickname, preferring an exact (case-sensitive) match."""
+        nickname = nickname.strip()
+        with self._lock:
+            ids = self._by_nickname.get(self._nickname_key(nickname))
+            if not ids:
+                return None
+            candidates = [self._users[user_id] for user_id in ids]
+        for candidate in candidates:
+            if ttstr(candidate.szNickname).strip() == nickname:
+                return candidate
+        return candidates[0]
+
+    def get_by_username(self, username):
+        return self._first(self._by_username, username)
+
+    def get_by_ip(self, ip_address):
+        """Returns all online users connected from the given IP address."""
+        with self._lock:
+            return [self._users[user_id] for user_id in self._by_ip.get(ip_address, ())]
+
+    def all_users(self):
+        """Returns a list of all online users."""
+        with self._lock:
+            return list(self._users.values())
+
+    def __len__(self):
+        return len(self._users)
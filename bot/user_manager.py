@@ -1,20 +1,27 @@
 import random
+import re
 import string
-from threading import Lock
+import time
 from TeamTalk5 import Channel, ChannelType, Codec, OPUS_APPLICATION_VOIP, UserType, ttstr
 from .utils import BotUtils as utils
+from .outbox import Outbox
+from .private_channels import PrivateChannelRegistry
+from .login_watch import LoginWatchIndex
 
 class UserManager:
     """
     Manages user-specific state, interactions, and event-driven logic.
     """
+    # Overall deadline, in seconds, for the location lookups behind /whoall and /users.
+    LOCATION_LOOKUP_TIMEOUT = 10
+
     def __init__(self, bot):
         self.bot = bot
         self._ = bot._        
-        self.private_channels = {}
-        self.private_channel_lock = Lock()
-        self.notifications = {}
-        self.username_notifications = {}
+        self.private_channels = PrivateChannelRegistry()
+        self.login_watches = LoginWatchIndex("login_watches.json")
+        self.bot.register_housekeeping(self.login_watches.expire, 300)
+        self.bot.register_housekeeping(self.login_watches.save, 30)
         self.user_messages = {}
         self.user_ip_info = {}
 
@@ -23,8 +30,8 @@ class UserManager:
         command_handler.register_command('private', self.handle_private_channel, help_text=self._("Creates a private, hidden channel with another user. Usage: /private <nickname>"))
         command_handler.register_command('who', self.handle_who_command, help_text=self._("Shows how many users are online from your country."))
         command_handler.register_command('whoall', self.handle_whoall_command, help_text=self._("Shows a summary of all users by country."))
-        command_handler.register_command('notify', self.handle_notify_command, help_text=self._("Get a Telegram notification when a user logs in. Usage: /notify <nickname> <telegram_chat_id>"))
-        command_handler.register_command('unotify', self.handle_unotify_command, help_text=self._("Get a Telegram notification when a username logs in. Usage: /unotify <username> <telegram_chat_id>"))
+        command_handler.register_command('notify', self.handle_notify_command, help_text=self._("Get a Telegram notification when a user logs in. Usage: /notify <nickname> <telegram_chat_id> [duration, e.g. 30m, 12h or 7d]"))
+        command_handler.register_command('unotify', self.handle_unotify_command, help_text=self._("Get a Telegram notification when a username logs in. Usage: /unotify <username> <telegram_chat_id> [duration, e.g. 30m, 12h or 7d]"))
         command_handler.register_command('pm', self.handle_tell_command, help_text=self._("Leaves a message for an offline user. Usage: /pm <username> <message>"))
         command_handler.register_command('messages', self.handle_messages_command, help_text=self._("Checks for any pending messages you have sent."))
         command_handler.register_command('users', self.handle_users_command, help_text=self._("Lists detailed information about all online users."))
@@ -37,15 +44,19 @@ class UserManager:
         nickname = ttstr(user.szNickname)
         username = ttstr(user.szUsername)
 
-        # 1. Handle Notifications
-        if nickname in self.notifications:
-            chat_id = self.notifications[nickname]["telegram_chat_id"]
-            utils.send_telegram_notification(self.bot.telegram_config['telegram_bot_token'], chat_id, self._("Hello. Important: The user {name} has logged in.").format(name=nickname))
-            del self.notifications[nickname]
-        if username in self.username_notifications:
-            chat_id = self.username_notifications[username]["telegram_chat_id"]
-            utils.send_telegram_notification(self.bot.telegram_config['telegram_bot_token'], chat_id, self._("Hello. Important: The user {username} has logged in.").format(username=username))
-            del self.username_notifications[username]
+        # Country bans the local GeoIP database couldn't decide at login are enforced once the online lookup answers.
+        if self.bot.bot_config["banned_countries"]:
+            country, _ = self.get_user_location(user.nUserID)
+            if self.bot.admin_cog.check_banned_country(user, country):
+                return
+
+        # 1. Handle Notifications; they are sent in the background, batched per chat
+        for watch in self.login_watches.pop_matches(nickname, username):
+            if watch.kind == LoginWatchIndex.NICKNAME:
+                message = self._("Hello. Important: The user {name} has logged in.").format(name=nickname)
+            else:
+                message = self._("Hello. Important: The user {username} has logged in.").format(username=username)
+            self.bot.telegram.notify(watch.chat_id, message)
 
         # 2. Deliver Pending Messages
         if username in self.user_messages:
@@ -78,7 +89,6 @@ class UserManager:
         user_id = user.nUserID
         if user_id in self.user_ip_info:
             del self.user_ip_info[user_id]
-        self.cleanup_private_channel(user)
 
     def handle_private_channel(self, textmessage, *args):
         if not args:
@@ -106,9 +116,10 @@ class UserManager:
             self.bot.privateMessage(user_id, self._("Sorry, your country information is not available."))
 
     def handle_whoall_command(self, textmessage, *args):
-        user_id = textmessage.nFromUserID
-        for user in self.bot.getServerUsers():
-            self.get_user_location(user.nUserID)
+        self.bot.io_pool.submit(self._whoall_task, textmessage.nFromUserID)
+
+    def _whoall_task(self, user_id):
+        self.resolve_locations(self.bot.user_index.all_users())
 
         country_counts = {}
         for info in self.user_ip_info.values():
@@ -123,39 +134,38 @@ class UserManager:
         else:
             self.bot.privateMessage(user_id, self._("No country information available for users."))
 
+    # Optional watch lifetime after the chat id, e.g. "30m", "12h" or "7d".
+    WATCH_DURATION_PATTERN = re.compile(r"^(\d+)([mhd])$", re.IGNORECASE)
+    WATCH_DURATION_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+    def _parse_watch_arguments(self, args):
+        """Splits "<name> <telegram_chat_id> [duration]" into (name, chat_id, expires_at)."""
+        args = list(args)
+        expires_at = None
+        if len(args) >= 3:
+            match = self.WATCH_DURATION_PATTERN.match(args[-1])
+            if match:
+                expires_at = time.time() + int(match.group(1)) * self.WATCH_DURATION_UNITS[match.group(2).lower()]
+                args.pop()
+        if len(args) < 2:
+            raise ValueError
+        return " ".join(args[:-1]), args[-1], expires_at
+
     def handle_notify_command(self, textmessage, *args):
         try:
-            full_args = " ".join(args)
-            last_space_index = full_args.rfind(" ")
-            if last_space_index == -1: raise ValueError
-            
-            nickname = full_args[:last_space_index]
-            telegram_chat_id = full_args[last_space_index + 1:]
-
-            self.notifications[nickname] = {
-                "user_id": textmessage.nFromUserID,
-                "telegram_chat_id": telegram_chat_id
-            }
+            nickname, telegram_chat_id, expires_at = self._parse_watch_arguments(args)
+            self.login_watches.add(LoginWatchIndex.NICKNAME, nickname, telegram_chat_id, textmessage.nFromUserID, expires_at)
             self.bot.privateMessage(textmessage.nFromUserID, self._("Alright. You will be notified when {name} logs in.").format(name=nickname))
         except (ValueError, IndexError):
-            self.bot.privateMessage(textmessage.nFromUserID, self._("Invalid command. Usage: /notify <nickname> <telegram_chat_id>"))
+            self.bot.privateMessage(textmessage.nFromUserID, self._("Invalid command. Usage: /notify <nickname> <telegram_chat_id> [duration, e.g. 30m, 12h or 7d]"))
 
     def handle_unotify_command(self, textmessage, *args):
         try:
-            full_args = " ".join(args)
-            last_space_index = full_args.rfind(" ")
-            if last_space_index == -1: raise ValueError
-
-            username = full_args[:last_space_index]
-            telegram_chat_id = full_args[last_space_index + 1:]
-
-            self.username_notifications[username] = {
-                "user_id": textmessage.nFromUserID,
-                "telegram_chat_id": telegram_chat_id
-            }
+            username, telegram_chat_id, expires_at = self._parse_watch_arguments(args)
+            self.login_watches.add(LoginWatchIndex.USERNAME, username, telegram_chat_id, textmessage.nFromUserID, expires_at)
             self.bot.privateMessage(textmessage.nFromUserID, self._("Alright. You will be notified when {username} logs in.").format(username=username))
         except (ValueError, IndexError):
-            self.bot.privateMessage(textmessage.nFromUserID, self._("Invalid command. Usage: /unotify <username> <telegram_chat_id>"))
+            self.bot.privateMessage(textmessage.nFromUserID, self._("Invalid command. Usage: /unotify <username> <telegram_chat_id> [duration, e.g. 30m, 12h or 7d]"))
 
     def handle_tell_command(self, textmessage, *args):
         try:
@@ -194,11 +204,14 @@ class UserManager:
             self.bot.privateMessage(textmessage.nFromUserID, self._("You have no pending messages."))
 
     def handle_users_command(self, textmessage, *args):
-        recipient_id = textmessage.nFromUserID
-        for user in self.bot.getServerUsers():
-            if user.nUserID == self.bot.getMyUserID(): continue
-            
-            country, _ = self.get_user_location(user.nUserID)
+        self.bot.io_pool.submit(self._users_task, textmessage.nFromUserID)
+
+    def _users_task(self, recipient_id):
+        my_user_id = self.bot.getMyUserID()
+        users = [user for user in self.bot.user_index.all_users() if user.nUserID != my_user_id]
+        locations = self.resolve_locations(users)
+        for user in users:
+            country, _ = locations.get(user.nUserID, (None, None))
             user_type_str = 'Administrator' if user.uUserType == UserType.USERTYPE_ADMIN else "User"
             
             user_info = self._("Nickname: {nickname}\nUsername: {username}\nType: {type}\nFrom: {country}\nStatus message: {status}").format(
@@ -208,7 +221,7 @@ class UserManager:
                 country=country or "Unknown", 
                 status=ttstr(user.szStatusMsg)
             )
-            self.bot.privateMessage(recipient_id, user_info)
+            self.bot.privateMessage(recipient_id, user_info, Outbox.BULK)
 
     
     def get_user_location(self, user_id):
@@ -220,83 +233,104 @@ class UserManager:
             return None, None
 
         ip_address = ttstr(user.szIPAddress)
-        country, city = utils.get_user_location(ip_address)
+        country, city = self.bot.geolocator.get_location(ip_address)
         if country:
             self.user_ip_info[user_id] = {"country": country, "city": city}
         return country, city
 
-    def create_private_channel(self, sender_name_str, second_name_str):
-        sender_name = ttstr(sender_name_str)
-        second_name = ttstr(second_name_str)
-        
-        with self.private_channel_lock:
-            for users in self.private_channels.keys():
-                if sender_name in users or second_name in users:
-                    sender_user = self.bot.getUserByName(sender_name)
-                    if sender_user:
-                        self.bot.privateMessage(sender_user.nUserID, self._("Either you or {second_name} is already in a private channel.").format(second_name=second_name))
-                    return
-
-            sender_user = self.bot.getUserByName(sender_name)
-            second_user = self.bot.getUserByName(second_name)
-
-            if not sender_user or not second_user:
-                if sender_user:
-                    self.bot.privateMessage(sender_user.nUserID, self._("User {second_name} not found.").format(second_name=second_name))
+    def resolve_locations(self, users):
+        """
+        Looks up the locations of many users at once, answering from the local
+        GeoIP database and the IP cache first and resolving the rest online in
+        batches within LOCATION_LOOKUP_TIMEOUT.
+        Returns a dict of user id -> (country, city).
+        """
+        addresses = {user.nUserID: ttstr(user.szIPAddress) for user in users}
+        infos = self.bot.geolocator.lookup_many(addresses.values(), timeout=self.LOCATION_LOOKUP_TIMEOUT)
+        locations = {}
+        for user_id, ip_address in addresses.items():
+            info = infos.get(ip_address)
+            if not info:
+                continue
+            locations[user_id] = (info.get("country"), info.get("city"))
+            if info.get("country"):
+                self.user_ip_info[user_id] = {"country": info.get("country"), "city": info.get("city")}
+        return locations
+
+    def create_private_channel(self, sender_name, second_name):
+        sender_user = self.bot.getUserByName(sender_name)
+        second_user = self.bot.getUserByName(second_name)
+
+        if not sender_user or not second_user:
+            if sender_user:
+                self.bot.privateMessage(sender_user.nUserID, self._("User {second_name} not found.").format(second_name=second_name))
+            return
+
+        channel_name = f"Private: {sender_name} & {second_name}"
+        entry = self.private_channels.reserve((sender_user.nUserID, second_user.nUserID), channel_name)
+        if entry is None:
+            self.bot.privateMessage(sender_user.nUserID, self._("Either you or {second_name} is already in a private channel.").format(second_name=second_name))
+            return
+
+        password = utils.generate_password()
+        channel = Channel()
+        channel.nParentID = self.bot.getRootChannelID()
+        channel.szName = ttstr(channel_name)
+        channel.szPassword = ttstr(password)
+        channel.bPassword = True
+        channel.uChannelType = ChannelType.CHANNEL_HIDDEN
+        channel.nMaxUsers = 2
+        channel.audiocodec.nCodec = Codec.OPUS_CODEC
+        channel.audiocodec.opus.nBitRate = 96000
+        channel.audiocodec.u.opus.nSampleRate = 48000
+        channel.audiocodec.u.opus.nChannels = 2
+        channel.audiocodec.opus.nFrameSizeMSec = 20
+        channel.audiocodec.u.opus.nTxIntervalMSec = 20
+        channel.audiocodec.u.opus.nApplication = OPUS_APPLICATION_VOIP
+
+        future = self.bot.command_tracker.track(self.bot.doMakeChannel(channel), "make private channel")
+        future.add_done_callback(lambda f: self._on_private_channel_created(f, entry, sender_user, second_user, password))
+
+    def _on_private_channel_created(self, future, entry, sender_user, second_user, password):
+        """Moves both users into the private channel once the server has created it."""
+        if future.exception() is not None:
+            self.private_channels.discard(entry)
+            self.bot.privateMessage(sender_user.nUserID, self._("Could not create the private channel: {error}").format(error=future.exception()))
+            return
+
+        # The channel id normally arrived with CHANNEL_NEW, just before the command completed.
+        channel_id = entry.channel_id
+        if channel_id is None:
+            created = [reply for reply in future.result() if isinstance(reply, Channel)]
+            if not created:
+                self.private_channels.discard(entry)
                 return
+            channel_id = created[0].nChannelID
+            self.private_channels.on_channel_new(channel_id, entry.name)
 
-            password = utils.generate_password()
-            channel = Channel()
-            channel.nParentID = self.bot.getRootChannelID()
-            channel.szName = ttstr(f"Private: {sender_name} & {second_name}")
-            channel.szPassword = ttstr(password)
-            channel.bPassword = True
-            channel.uChannelType = ChannelType.CHANNEL_HIDDEN
-            channel.nMaxUsers = 2
-            channel.audiocodec.nCodec = Codec.OPUS_CODEC
-            channel.audiocodec.opus.nBitRate = 96000
-            channel.audiocodec.u.opus.nSampleRate = 48000
-            channel.audiocodec.u.opus.nChannels = 2
-            channel.audiocodec.opus.nFrameSizeMSec = 20
-            channel.audiocodec.u.opus.nTxIntervalMSec = 20
-            channel.audiocodec.u.opus.nApplication = OPUS_APPLICATION_VOIP
-            
-            self.bot.doMakeChannel(channel)
-            channel_key = tuple(sorted((sender_name, second_name)))
-            self.private_channels[channel_key] = channel
+        self.bot.privateMessage(sender_user.nUserID, self._("Joining private channel. Password: {password}").format(password=password))
+        self.bot.privateMessage(second_user.nUserID, self._("Joining private channel. Password: {password}").format(password=password))
+        self.bot.doMoveUser(sender_user.nUserID, channel_id)
+        self.bot.doMoveUser(second_user.nUserID, channel_id)
+        self.bot.doChannelOp(sender_user.nUserID, channel_id, bMakeOperator=True)
+        self.bot.doChannelOp(second_user.nUserID, channel_id, bMakeOperator=True)
 
-            self.bot.privateMessage(sender_user.nUserID, self._("Joining private channel. Password: {password}").format(password=password))
-            self.bot.privateMessage(second_user.nUserID, self._("Joining private channel. Password: {password}").format(password=password))
-            
-            def move_users_to_channel():
-                channel_path = f"/{ttstr(channel.szName)}"
-                channel_id = 0
-                for _ in range(20):
-                    channel_id = self.bot.getChannelIDFromPath(ttstr(channel_path))
-                    if channel_id != 0: break
-                    time.sleep(0.1)
-                
-                if channel_id != 0:
-                    self.bot.doMoveUser(sender_user.nUserID, channel_id)
-                    self.bot.doMoveUser(second_user.nUserID, channel_id)
-                    self.bot.doChannelOp(sender_user.nUserID, channel_id, bMakeOperator=True)
-                    self.bot.doChannelOp(second_user.nUserID, channel_id, bMakeOperator=True)
-            
-            Thread(target=move_users_to_channel).start()
-
-    def cleanup_private_channel(self, user):
-        user_nickname = ttstr(user.szNickname)
-        with self.private_channel_lock:
-            channel_key_to_delete = None
-            for key in self.private_channels:
-                if user_nickname in key:
-                    channel_key_to_delete = key
-                    break
-            
-            if channel_key_to_delete:
-                channel_obj = self.private_channels[channel_key_to_delete]
-                channel_path = f"/{ttstr(channel_obj.szName)}"
-                channel_id = self.bot.getChannelIDFromPath(ttstr(channel_path))
-                if channel_id != 0:
-                    self.bot.doRemoveChannel(channel_id)
-                del self.private_channels[channel_key_to_delete]
\ No newline at end of file
+    def on_channel_new(self, channel):
+        self.private_channels.on_channel_new(channel.nChannelID, ttstr(channel.szName))
+
+    def on_channel_removed(self, channel):
+        self.private_channels.on_channel_removed(channel.nChannelID)
+
+    def on_user_joined_channel(self, user):
+        self.private_channels.on_user_joined(user.nUserID, user.nChannelID)
+
+    def on_user_left_channel(self, channel_id, user):
+        """Removes a private channel once the last of its users has left it."""
+        self._remove_private_channel(self.private_channels.on_user_left(user.nUserID, channel_id))
+
+    def on_user_logged_out(self, user):
+        self._remove_private_channel(self.private_channels.on_user_logged_out(user.nUserID))
+
+    def _remove_private_channel(self, channel_id):
+        if channel_id:
+            self.bot.doRemoveChannel(channel_id)
\ No newline at end of file
@@ -8,6 +8,7 @@ import string
 import logging
 import traceback
 from concurrent.futures import ThreadPoolExecutor
+from bot.ip_intel import RateLimited
 
 
 class ShutdownSignal(Exception):
@@ -118,56 +119,52 @@ class BotUtils:
         return duration_seconds
 
     @staticmethod
-    def get_user_location(ip_address):
-        """Fetches country and city for a given IP address."""
-        if not ip_address or ip_address == "127.0.0.1":
-            return "Local", "Host"
-        
+    def fetch_ip_info(ip_address):
+        """
+        Looks up country, city and proxy status for an IP address with a single
+        ip-api.com request. Returns a dict, or None if ip-api could not resolve
+        the address. Raises RateLimited when the free tier's limit is used up
+        (carrying this request's answer if it still got one) and
+        RequestException on network errors.
+        """
         base_url = f"http://ip-api.com/json/{ip_address}"
-        params = {"fields": "status,message,country,city"}
-        try:
-            response = requests.get(base_url, params=params, timeout=5)
-            response.raise_for_status()
-            data = response.json()
-            if data.get("status") == "success":
-                return data.get("country"), data.get("city")
-            else:
-                print(f"Error getting location for {ip_address}: {data.get('message')}")
-                return None, None
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching location for {ip_address}: {e}")
-            return None, None
+        params = {"fields": "status,message,country,city,proxy"}
+        response = requests.get(base_url, params=params, timeout=5)
+        if response.status_code == 429:
+            raise RateLimited(int(response.headers.get("X-Ttl", 60)))
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status") != "success":
+            print(f"Error getting location for {ip_address}: {data.get('message')}")
+            result = None
+        else:
+            result = {"country": data.get("country"), "city": data.get("city"), "proxy": data.get("proxy", False)}
+        if response.headers.get("X-Rl") == "0":
+            raise RateLimited(int(response.headers.get("X-Ttl", 60)), result=result, has_result=True)
+        return result
 
     @staticmethod
-    def is_vpn(ip_address):
-        """Checks if an IP address is likely a VPN/proxy."""
-        if not ip_address or ip_address == "127.0.0.1":
-            return False
-        
-        base_url = f"http://ip-api.com/json/{ip_address}"
-        params = {"fields": "status,message,proxy"}
-        try:
-            response = requests.get(base_url, params=params, timeout=5)
-            response.raise_for_status()
-            data = response.json()
+    def fetch_ip_info_batch(ip_addresses):
+        """
+        Looks up up to 100 IP addresses with a single request to ip-api.com's
+        batch endpoint. Returns a dict mapping each address to the same kind of
+        result as `fetch_ip_info`. Raises RateLimited and RequestException like it.
+        """
+        url = "http://ip-api.com/batch"
+        params = {"fields": "status,message,country,city,proxy,query"}
+        response = requests.post(url, params=params, json=list(ip_addresses), timeout=5)
+        if response.status_code == 429:
+            raise RateLimited(int(response.headers.get("X-Ttl", 60)))
+        response.raise_for_status()
+        results = {}
+        for data in response.json():
             if data.get("status") == "success":
-                return data.get("proxy", False)
-            return False
-        except requests.exceptions.RequestException:
-            return False
-
-    @staticmethod
-    def send_telegram_notification(token, chat_id, message):
-        """Sends a notification to a specified Telegram chat ID."""
-        if not token or not chat_id:
-            return
-        url = f"https://api.telegram.org/bot{token}/sendMessage"
-        data = {"chat_id": chat_id, "text": message}
-        try:
-            response = requests.post(url, json=data, timeout=10)
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            print(f"Error sending Telegram notification: {e}")
+                results[data["query"]] = {"country": data.get("country"), "city": data.get("city"), "proxy": data.get("proxy", False)}
+            else:
+                results[data.get("query")] = None
+        if response.headers.get("X-Rl") == "0":
+            raise RateLimited(int(response.headers.get("X-Ttl", 60)), result=results, has_result=True)
+        return results
 
 
 class LoggingThreadPoolExecutor(ThreadPoolExecutor):
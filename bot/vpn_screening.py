@@ -0,0 +1,104 @@
+import ipaddress
+import threading
+import time
+from TeamTalk5 import BanType, ttstr
+from bot.outbox import Outbox
+from bot.utils import LoggingThreadPoolExecutor
+
+
+class VPNScreener:
+    """
+    Screens logged-in users for VPN and proxy connections in the background,
+    so logins never wait on the lookup service.
+
+    Addresses are checked concurrently through the shared IP cache. A proxy
+    verdict is remembered for the whole /24 (/48 for IPv6) subnet, so later
+    logins from the same proxy range are removed without another lookup, and
+    logins from a subnet whose lookup is already running wait for that
+    verdict instead of starting their own. Flagged users are banned by IP
+    and kicked once the verdict arrives, if they are still online.
+    """
+    SUBNET_VERDICT_TTL = 6 * 3600
+
+    def __init__(self, bot, workers=8):
+        self.bot = bot
+        self._ = bot._
+        self._pool = LoggingThreadPoolExecutor(max_workers=workers, thread_name_prefix="TTBot_VPN")
+        self._lock = threading.Lock()
+        self._proxy_subnets = {}
+        self._subnets_in_flight = {}
+        self.screened = 0
+        self.flagged = 0
+
+    @staticmethod
+    def subnet_of(ip_address):
+        """Returns the /24 (IPv4) or /48 (IPv6) network an address belongs to, or None."""
+        try:
+            address = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return None
+        prefix = 24 if address.version == 4 else 48
+        return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+    def _subnet_is_proxy(self, subnet):
+        with self._lock:
+            expires_at = self._proxy_subnets.get(subnet)
+            if expires_at is None:
+                return False
+            if expires_at <= time.time():
+                del self._proxy_subnets[subnet]
+                return False
+            return True
+
+    def screen(self, user):
+        """Queues a logged-in user for screening and returns immediately."""
+        ip_address = ttstr(user.szIPAddress)
+        subnet = self.subnet_of(ip_address)
+        if subnet is None or ip_address in self.bot.ip_cache.LOCAL_ADDRESSES:
+            return
+        self._pool.submit(self._screen_task, user, ip_address, subnet)
+
+    def _screen_task(self, user, ip_address, subnet):
+        self.screened += 1
+        if self._subnet_is_proxy(subnet):
+            self._remove_user(user, ip_address)
+            return
+
+        # If another address from this subnet is being looked up, its verdict may cover this one too.
+        with self._lock:
+            event = self._subnets_in_flight.get(subnet)
+            is_owner = event is None
+            if is_owner:
+                event = self._subnets_in_flight[subnet] = threading.Event()
+        if not is_owner:
+            event.wait(timeout=10)
+            if self._subnet_is_proxy(subnet):
+                self._remove_user(user, ip_address)
+                return
+
+        is_proxy = False
+        try:
+            is_proxy = self.bot.ip_cache.is_proxy(ip_address)
+            if is_proxy:
+                with self._lock:
+                    self._proxy_subnets[subnet] = time.time() + self.SUBNET_VERDICT_TTL
+        finally:
+            if is_owner:
+                with self._lock:
+                    del self._subnets_in_flight[subnet]
+                event.set()
+        if is_proxy:
+            self._remove_user(user, ip_address)
+
+    def _remove_user(self, user, ip_address):
+        current = self.bot.user_index.get(user.nUserID)
+        if current is None or ttstr(current.szIPAddress) != ip_address:
+            return # Already gone, or the id now belongs to someone else
+        self.flagged += 1
+        print(self._("User {nickname} ({ip}) is connecting through a VPN or proxy, banning.").format(nickname=ttstr(user.szNickname), ip=ip_address))
+        self.bot.privateMessage(user.nUserID, self._("VPN and proxy connections are not allowed on this server."), Outbox.MODERATION)
+        self.bot.admin_cog.ban_user(user.nUserID, BanType.BANTYPE_IPADDR, user=current)
+        self.bot.kick_user(user.nUserID)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
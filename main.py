@@ -11,6 +11,12 @@ from bot.config_handler import ConfigHandler
 from bot.account import Account
 from bot.utils import BotUtils as utils, ShutdownSignal, RestartSignal
 
+# Event loop tuning: how many events one batch may handle, how long it may run,
+# and how long to block waiting for new events so housekeeping still runs when idle.
+EVENT_BATCH_MAX_EVENTS = 200
+EVENT_BATCH_BUDGET_MS = 50
+EVENT_BATCH_WAIT_MS = 1000
+
 def list_audio_devices():
     """
     Lists available audio input and output devices and then exits.
@@ -99,7 +105,7 @@ def main():
         restart = False
         while True:  # Inner loop for event handling
             try:
-                bot.runEventLoop()
+                bot.runEventLoopBatch(EVENT_BATCH_MAX_EVENTS, EVENT_BATCH_BUDGET_MS, EVENT_BATCH_WAIT_MS)
             except KeyboardInterrupt:
                 print("\nShutting down bot...")
                 bot.shutdown()